@@ -0,0 +1,191 @@
+"""Lokaler Ersatz für die Discord-Objekte, die der Bot anfasst – ohne Netzwerk, mit Aufrufzähler."""
+import asyncio
+import itertools
+from collections import Counter
+
+calls = Counter()
+# Simulierte Antwortzeit der REST-Aufrufe in Sekunden (0 = sofort)
+latency = 0.0
+_ids = itertools.count(10 ** 17)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+async def _rest(name: str):
+    calls[name] += 1
+    if latency:
+        await asyncio.sleep(latency)
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.bot = False
+        self.mention = f"<@{user_id}>"
+
+
+class FakeMessage:
+    def __init__(self, channel, **kwargs):
+        self.id = next_id()
+        self.channel = channel
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{self.id}"
+        self.kwargs = kwargs
+
+    async def edit(self, **kwargs):
+        await _rest("message.edit")
+        self.kwargs.update(kwargs)
+        return self
+
+
+class FakeChannel:
+    def __init__(self, guild, channel_id: int | None = None):
+        self.guild = guild
+        self.id = channel_id or next_id()
+        self.mention = f"<#{self.id}>"
+        self.messages: dict[int, FakeMessage] = {}
+
+    async def send(self, content=None, **kwargs):
+        await _rest("channel.send")
+        message = FakeMessage(self, content=content, **kwargs)
+        self.messages[message.id] = message
+        return message
+
+    def get_partial_message(self, message_id: int):
+        return self.messages.get(message_id) or FakeMessage(self)
+
+    async def fetch_message(self, message_id: int):
+        await _rest("channel.fetch_message")
+        return self.messages.get(message_id) or FakeMessage(self)
+
+
+class FakeScheduledEvent:
+    def __init__(self, guild, **kwargs):
+        self.id = next_id()
+        self.guild = guild
+        self.description = kwargs.get("description")
+        self.kwargs = kwargs
+        self.interested: dict[int, FakeUser] = {}
+
+    async def edit(self, **kwargs):
+        await _rest("scheduled_event.edit")
+        self.description = kwargs.get("description", self.description)
+        return self
+
+    async def users(self, **kwargs):
+        # Discord liefert bis zu 100 Interessenten pro Seite
+        users = list(self.interested.values())
+        for offset in range(0, max(len(users), 1), 100):
+            await _rest("scheduled_event.users")
+            for user in users[offset:offset + 100]:
+                yield user
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int | None = None):
+        self.id = guild_id or next_id()
+        self.shard_id = 0
+        self.channel = FakeChannel(self)
+        self.scheduled_events: dict[int, FakeScheduledEvent] = {}
+
+    def get_channel(self, channel_id: int):
+        return self.channel if channel_id == self.channel.id else None
+
+    def get_scheduled_event(self, event_id: int):
+        return self.scheduled_events.get(event_id)
+
+    async def create_scheduled_event(self, **kwargs):
+        # Wie discord.py ≥2.4: das Cover-Bild muss als bytes übergeben werden
+        if "image" in kwargs and not isinstance(kwargs["image"], bytes):
+            raise TypeError(f"image muss bytes sein, nicht {type(kwargs['image']).__name__}")
+        await _rest("guild.create_scheduled_event")
+        event = FakeScheduledEvent(self, **kwargs)
+        self.scheduled_events[event.id] = event
+        return event
+
+    async def fetch_scheduled_event(self, event_id: int, **kwargs):
+        await _rest("guild.fetch_scheduled_event")
+        return self.scheduled_events[event_id]
+
+    async def fetch_scheduled_events(self, **kwargs):
+        await _rest("guild.fetch_scheduled_events")
+        return list(self.scheduled_events.values())
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs):
+        await _rest("response.defer")
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        calls["response.send_message"] += 1
+        self._done = True
+        self._interaction._original = await self._interaction.channel.send(content, **kwargs)
+
+    async def edit_message(self, **kwargs):
+        await _rest("response.edit_message")
+        self._done = True
+
+    async def send_modal(self, modal):
+        await _rest("response.send_modal")
+        self._done = True
+
+
+class FakeFollowup:
+    async def send(self, content=None, **kwargs):
+        await _rest("followup.send")
+
+
+class FakeInteraction:
+    def __init__(self, guild: FakeGuild, user_id: int):
+        self.id = next_id()
+        self.user = FakeUser(user_id)
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = guild.channel
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup()
+        self._original = None
+
+    async def original_response(self):
+        return self._original
+
+    async def edit_original_response(self, **kwargs):
+        await _rest("interaction.edit_original_response")
+        return self._original
+
+
+class FakeHttpResponse:
+    def __init__(self, body: bytes):
+        self.status = 200
+        self.content_type = "image/png"
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeHttpSession:
+    def __init__(self, body: bytes = b"\x89PNG" + b"\x00" * 300_000):
+        self._body = body
+
+    def get(self, url):
+        calls["http.get"] += 1
+        return FakeHttpResponse(self._body)
+
+    async def close(self):
+        pass
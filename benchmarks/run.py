@@ -0,0 +1,330 @@
+"""Offline-Benchmarks für die Hot Paths des Bots.
+
+Aufruf aus dem Repo-Verzeichnis:
+
+    python -m benchmarks.run [--output bench.json] [--sizes 10 1000 10000]
+
+Alle Discord-Aufrufe laufen gegen die Attrappen aus ``benchmarks.fakes``; das Ergebnis ist JSON,
+damit Regressionen über die Zeit verglichen werden können.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import main
+from storage import EventStore, JsonBackend, Participants
+from benchmarks import fakes
+
+
+def _percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+    return {
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def _make_event(guild: fakes.FakeGuild, start: datetime) -> dict:
+    scheduled = fakes.FakeScheduledEvent(guild, description="")
+    guild.scheduled_events[scheduled.id] = scheduled
+    message = fakes.FakeMessage(guild.channel)
+    return {
+        "title": "Benchmark-Event",
+        "start_ts": int(start.timestamp()),
+        "timezone": main.EVENT_TIMEZONE,
+        "game": "Spiel",
+        "max_players": 10,
+        "description": "Beschreibung",
+        "rulebook": "",
+        "participants": Participants(),
+        "message_id": message.id,
+        "channel_id": guild.channel.id,
+        "guild_id": guild.id,
+        "discord_event_id": scheduled.id,
+        "message_link": message.jump_url,
+    }
+
+
+async def _install(workdir: str, guild: fakes.FakeGuild, event_count: int = 0) -> EventStore:
+    """Hängt Store, Asset-Cache und Client des Bots an die Attrappen."""
+    path = f"{workdir}/event_data.json"
+    seed = JsonBackend(path)
+    seed.load()
+    start = datetime.now().astimezone() + timedelta(days=2)
+    events = {str(fakes.next_id()): _make_event(guild, start) for _ in range(event_count)}
+    for event in events.values():
+        event["participants"] = event["participants"].to_dict()
+    guild_key = str(guild.id)
+    seed.write({
+        "events": {(guild_key, event_id): event for event_id, event in events.items()},
+        "settings": {guild_key: {"admins": [], "moderators": [], "event_channel_id": guild.channel.id}},
+    })
+
+    main.store = EventStore(functools.partial(JsonBackend, path))
+    main.asset_cache = main.AssetCache(f"{workdir}/asset_cache", main.ASSET_CACHE_MAX_BYTES)
+    main.client.http_session = fakes.FakeHttpSession()
+    main.GUILD_ID = guild.id
+    main.client.get_guild = lambda guild_id: guild if guild_id == guild.id else None
+    main.client.get_channel = guild.get_channel
+    main.native_description_fingerprints.clear()
+    main.scheduler = main.EventScheduler()
+    main.native_sync = main.NativeSync(delay=0)
+    main.native_event_index.clear()
+    return main.store
+
+
+async def bench_participation(workdir: str, clicks: int, event_count: int = 10) -> dict:
+    guild = fakes.FakeGuild()
+    store = await _install(workdir, guild, event_count)
+    await store.load()
+    event_ids = list(store.guild(guild.id)["events"])
+    main.participation_queue = main.ParticipationQueue(edit_window=0)
+    rng = random.Random(42)
+    choices = ["yes", "maybe", "no"]
+    interactions = [
+        (fakes.FakeInteraction(guild, rng.randrange(1, 500)), rng.choice(event_ids), rng.choice(choices))
+        for _ in range(clicks)
+    ]
+
+    fakes.calls.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        main._handle_participation(interaction, event_id, choice)
+        for interaction, event_id, choice in interactions
+    ))
+    await main.participation_queue.drain()
+    elapsed = time.perf_counter() - started
+    await main.native_sync.drain()
+    await store.close()
+    return {
+        "clicks": clicks,
+        "events": event_count,
+        "seconds": elapsed,
+        "clicks_per_second": clicks / elapsed,
+        "message_edits": fakes.calls["interaction.edit_original_response"],
+    }
+
+
+async def bench_native_rsvps(workdir: str, rsvps: int, event_count: int = 10) -> dict:
+    guild = fakes.FakeGuild()
+    store = await _install(workdir, guild, event_count)
+    await store.load()
+    main.native_sync = main.NativeSync(delay=0.05)
+    main.schedule_guild_events(guild.id)
+    scheduled_events = [
+        guild.scheduled_events[event["discord_event_id"]] for event in store.guild(guild.id)["events"].values()
+    ]
+    rng = random.Random(7)
+    updates = [
+        (rng.choice(scheduled_events), fakes.FakeUser(rng.randrange(1, 500)), rng.random() < 0.8)
+        for _ in range(rsvps)
+    ]
+
+    fakes.calls.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        main.on_scheduled_event_user_add(event, user) if add else main.on_scheduled_event_user_remove(event, user)
+        for event, user, add in updates
+    ))
+    applied = time.perf_counter() - started
+    await main.native_sync.drain()
+    calls = dict(fakes.calls)
+    # Discord führt die Interessenten-Liste selbst – hier nachgebildet
+    for event, user, add in updates:
+        if add:
+            event.interested[user.id] = user
+        else:
+            event.interested.pop(user.id, None)
+
+    # Nutzer außerhalb des Caches meldet das Gateway nicht – sie kommen über den Abgleich in check_events
+    for event in scheduled_events:
+        for user_id in rng.sample(range(500, 1000), 20):
+            event.interested[user_id] = fakes.FakeUser(user_id)
+    fakes.calls.clear()
+    started = time.perf_counter()
+    reconciled = await main.reconcile_native_rsvps(guild, store.guild(guild.id)["events"])
+    reconcile_seconds = time.perf_counter() - started
+    await main.native_sync.drain()
+    await store.close()
+    return {
+        "rsvps": rsvps,
+        "events": event_count,
+        "apply_seconds": applied,
+        "rsvps_per_second": rsvps / applied,
+        "calls": calls,
+        "reconciled": reconciled,
+        "reconcile_ms": reconcile_seconds * 1000,
+        "reconcile_calls": dict(fakes.calls),
+    }
+
+
+async def bench_check_events(workdir: str, event_count: int) -> dict:
+    guild = fakes.FakeGuild()
+    store = await _install(workdir, guild, event_count)
+    await store.load()
+
+    fakes.calls.clear()
+    started = time.perf_counter()
+    await main.check_events.coro()
+    first_tick = time.perf_counter() - started
+    first_calls = dict(fakes.calls)
+
+    fakes.calls.clear()
+    started = time.perf_counter()
+    await main.check_events.coro()
+    steady_tick = time.perf_counter() - started
+    await store.close()
+    return {
+        "events": event_count,
+        "first_tick_ms": first_tick * 1000,
+        "first_tick_calls": first_calls,
+        "steady_tick_ms": steady_tick * 1000,
+        "steady_tick_calls": dict(fakes.calls),
+    }
+
+
+async def bench_event_creation(workdir: str, runs: int) -> dict:
+    guild = fakes.FakeGuild()
+    store = await _install(workdir, guild)
+    await store.load()
+    start = datetime.now().astimezone() + timedelta(days=3)
+    basic_data = {"title": "Benchmark", "date": start.strftime("%d.%m.%Y"), "time": start.strftime("%H:%M")}
+
+    samples = []
+    fakes.calls.clear()
+    for _ in range(runs):
+        modal = main.EventModalDetails(basic_data)
+        for text_input, value in (
+            (modal.game_title, "Spiel"), (modal.max_players, "8"), (modal.duration, "90"),
+            (modal.description, "Beschreibung"), (modal.rulebook, ""),
+        ):
+            text_input._value = value
+        interaction = fakes.FakeInteraction(guild, 1)
+        started = time.perf_counter()
+        await modal.on_submit(interaction)
+        samples.append(time.perf_counter() - started)
+    await store.close()
+    # Fehler beim Anlegen des nativen Events werden im Bot nur geloggt – hier müssen sie auffallen
+    native_events = sum(1 for event in store.guild(guild.id)["events"].values() if event.get("discord_event_id"))
+    if native_events != runs:
+        raise RuntimeError(f"Nur {native_events} von {runs} nativen Events angelegt")
+    return {"runs": runs, **_percentiles(samples), "http_downloads": fakes.calls["http.get"]}
+
+
+async def bench_series(workdir: str, weeks: int, latency: float = 0.02) -> dict:
+    guild = fakes.FakeGuild()
+    store = await _install(workdir, guild)
+    await store.load()
+    store.guild(guild.id)["moderators"].append(1)
+    main.SERIES_WINDOW_DAYS = weeks * 7 + 7
+    start = datetime.now().astimezone() + timedelta(days=1)
+    until = start + timedelta(weeks=weeks - 1)
+    interaction = fakes.FakeInteraction(guild, 1)
+    weekly = main.app_commands.Choice(name="Wöchentlich", value="weekly")
+
+    fakes.calls.clear()
+    fakes.latency = latency
+    started = time.perf_counter()
+    try:
+        await main.create_event_series.callback(
+            interaction, "Spieleabend", start.strftime("%d.%m.%Y"), start.strftime("%H:%M"), weekly,
+            until.strftime("%d.%m.%Y"), "Spiel", 10, "Beschreibung"
+        )
+    finally:
+        fakes.latency = 0.0
+    elapsed = time.perf_counter() - started
+    rest_calls = sum(count for name, count in fakes.calls.items() if name != "http.get")
+    await store.close()
+    return {
+        "occurrences": len(store.guild(guild.id)["events"]),
+        "latency_ms": latency * 1000,
+        "seconds": elapsed,
+        "rest_calls": rest_calls,
+        "serial_estimate_seconds": rest_calls * latency,
+    }
+
+
+async def bench_startup(workdir: str, event_count: int) -> dict:
+    guild = fakes.FakeGuild()
+    store = await _install(workdir, guild, event_count)
+
+    async def _no_sync(**kwargs):
+        return []
+
+    main.client.tree.sync = _no_sync
+    started = time.perf_counter()
+    await store.load()
+    loaded = time.perf_counter()
+    await main.on_ready()
+    finished = time.perf_counter()
+
+    main.check_events.cancel()
+    if main.scheduler._task is not None:
+        main.scheduler._task.cancel()
+    await store.close()
+    return {
+        "events": event_count,
+        "load_ms": (loaded - started) * 1000,
+        "on_ready_ms": (finished - loaded) * 1000,
+        "total_ms": (finished - started) * 1000,
+    }
+
+
+async def run(sizes: list, clicks: int, creations: int) -> dict:
+    results = {"participation": [], "native_rsvps": None, "series": None, "check_events": [], "event_creation": None, "startup": []}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            results["check_events"].append(await bench_check_events(workdir, size))
+        with tempfile.TemporaryDirectory() as workdir:
+            results["startup"].append(await bench_startup(workdir, size))
+    with tempfile.TemporaryDirectory() as workdir:
+        results["participation"].append(await bench_participation(workdir, clicks))
+    with tempfile.TemporaryDirectory() as workdir:
+        results["participation"].append(await bench_participation(workdir, clicks, event_count=1))
+    with tempfile.TemporaryDirectory() as workdir:
+        results["native_rsvps"] = await bench_native_rsvps(workdir, clicks)
+    with tempfile.TemporaryDirectory() as workdir:
+        results["series"] = await bench_series(workdir, weeks=12)
+    with tempfile.TemporaryDirectory() as workdir:
+        results["event_creation"] = await bench_event_creation(workdir, creations)
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline-Benchmarks für PEPEGA")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--clicks", type=int, default=5000)
+    parser.add_argument("--creations", type=int, default=50)
+    parser.add_argument("--output", help="Pfad für das JSON-Ergebnis (Standard: stdout)")
+    args = parser.parse_args()
+
+    # Fehler aus den Attrappen nicht mitmessen, Warnungen reichen
+    logging.getLogger().setLevel(logging.WARNING)
+    report = {
+        "timestamp": datetime.now().astimezone().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": asyncio.run(run(args.sizes, args.clicks, args.creations)),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main_cli()
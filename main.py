@@ -5,10 +5,20 @@ import asyncio
 import logging
 from dotenv import load_dotenv
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
+from discord.webhook.async_ import async_context
 from datetime import datetime, timedelta
 import aiohttp
-import base64
+from collections import OrderedDict
+import hashlib
+import heapq
+import itertools
+import time
+import functools
+from zoneinfo import ZoneInfo
+from storage import EventStore, Participants, open_backend, DEFAULT_TIMEZONE
+from metrics import metrics, instrument_http_client, instrument_webhook_adapter, RateLimitLogHandler, start_http_server
 
 # Logging-Konfiguration
 logging.basicConfig(level=logging.INFO)
@@ -18,133 +28,628 @@ log = logging.getLogger('BOT-MAIN')
 load_dotenv()
 TOKEN: Final[str] = os.getenv('DISCORD_TOKEN')
 GUILD_ID: Final[int] = int(os.getenv('GUILD_ID')) if os.getenv('GUILD_ID') else None
-DATA_FILE = "event_data.json"
+# Eigene Dateien pro Prozess, wenn die Shards auf mehrere Prozesse verteilt werden
+DATA_FILE: Final[str] = os.getenv('DATA_FILE', 'event_data.json')
+DATABASE_FILE: Final[str] = os.getenv('DATABASE_FILE', 'event_data.db')
+STORAGE_BACKEND: Final[str] = os.getenv('STORAGE_BACKEND', 'json').lower()
+# Zeitzone, in der Datum und Uhrzeit bei der Event-Erstellung eingegeben und angezeigt werden
+EVENT_TIMEZONE: Final[str] = os.getenv('EVENT_TIMEZONE', DEFAULT_TIMEZONE)
+SWEEP_CONCURRENCY: Final[int] = int(os.getenv('SWEEP_CONCURRENCY', '5'))
+# Wie weit im Voraus Termine einer Serie angelegt werden
+SERIES_WINDOW_DAYS: Final[int] = int(os.getenv('SERIES_WINDOW_DAYS', '28'))
+METRICS_HOST: Final[str] = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT: Final[int] = int(os.getenv('METRICS_PORT', '9108'))
+# Sharding: ohne Angaben ermittelt discord.py die empfohlene Shard-Anzahl selbst.
+# Mit SHARD_IDS übernimmt diese Instanz nur einen Teil der Shards (z.B. "0,1" von SHARD_COUNT=4)
+SHARD_COUNT: Final[int] = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+SHARD_IDS: Final[list] = [int(i) for i in os.getenv('SHARD_IDS').split(',')] if os.getenv('SHARD_IDS') else None
 
 # Bot-Initialisierung
+class PepegaBot(commands.AutoShardedBot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http_session = None
+        self.metrics_runner = None
+
+    async def setup_hook(self):
+        # Eine gemeinsame, langlebige HTTP-Session für alle ausgehenden Requests
+        self.http_session = aiohttp.ClientSession()
+        # Daten im Storage-Thread laden, bevor die erste Interaktion eintrifft
+        await store.load()
+        await asset_cache.load()
+        # Ein Handler für alle Teilnahme-Buttons, unabhängig von der Anzahl der Events
+        self.add_dynamic_items(ParticipationButton, ParticipantListButton)
+
+        # REST-Aufrufe und 429er mitzählen, Metriken lokal bereitstellen
+        instrument_http_client(self.http)
+        # Interaktionsantworten laufen über den Webhook-Adapter statt über self.http
+        instrument_webhook_adapter(async_context.get())
+        rate_limit_handler = RateLimitLogHandler()
+        logging.getLogger("discord.http").addHandler(rate_limit_handler)
+        logging.getLogger("discord.webhook.async_").addHandler(rate_limit_handler)
+        if METRICS_PORT:
+            self.metrics_runner = await start_http_server(METRICS_HOST, METRICS_PORT)
+
+    async def close(self):
+        await super().close()
+        if self.http_session is not None:
+            await self.http_session.close()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        # Ausstehende Änderungen beim Herunterfahren sichern
+        await store.close()
+
+
 intents = discord.Intents.default()
 intents.message_content = True
-client = commands.Bot(command_prefix='!', intents=intents)
+# RSVPs auf native Events meldet das Gateway nur für Nutzer im Cache; alle übrigen holt check_events nach
+intents.guild_scheduled_events = True
+# Längere Rate-Limit-Wartezeiten wirft discord.py als RateLimited, statt selbst zu schlafen –
+# so pausiert SweepRunner nur die betroffene Route. 30 Sekunden ist das von discord.py erlaubte Minimum.
+MAX_RATELIMIT_TIMEOUT_SECONDS = 30.0
+client = PepegaBot(
+    command_prefix='!', intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS,
+    max_ratelimit_timeout=MAX_RATELIMIT_TIMEOUT_SECONDS,
+    # Keine Mitgliederlisten beim Start laden, damit on_ready nicht von der Servergröße abhängt
+    chunk_guilds_at_startup=False
+)
 
-# Datenverwaltung
-if not os.path.exists(DATA_FILE):
-    with open(DATA_FILE, "w") as f:
-        json.dump({"events": {}, "admins": [], "moderators": [], "event_channel_id": None}, f)
+# Datenverwaltung – Events, Rechte und Event-Channel liegen je Guild in einer eigenen Partition.
+# GUILD_ID dient nur noch dazu, Daten aus dem alten Ein-Server-Format zuzuordnen
+store = EventStore(
+    functools.partial(open_backend, STORAGE_BACKEND, DATA_FILE, DATABASE_FILE, GUILD_ID),
+    timezone_name=EVENT_TIMEZONE
+)
 
-def load_data():
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+def load_data(guild_id: int):
+    return store.guild(guild_id)
 
-def save_data(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def save_data(guild_id: int, event_id: str | None = None):
+    # Merkt die Änderung nur vor – geschrieben wird gebündelt im Storage-Thread.
+    # Mit event_id wird nur dieses Event geschrieben, sonst die Einstellungen der Guild
+    if event_id is not None:
+        store.mark_event_dirty(guild_id, event_id)
+    else:
+        store.mark_settings_dirty(guild_id)
 
-# --- Persistent View für Event-Buttons ---
-class EventButtons(discord.ui.View):
-    def __init__(self, event_id: str):
-        super().__init__(timeout=None)  # persistent: kein Timeout
-        self.event_id = event_id
 
-        # Buttons manuell erstellen, mit festen custom_ids
-        join_button = discord.ui.Button(
-            label="✅ Teilnehmen",
-            style=discord.ButtonStyle.green,
-            custom_id=f"join_{event_id}"
-        )
-        join_button.callback = self.join_event
+def is_moderator(interaction: discord.Interaction, data: dict) -> bool:
+    return interaction.user.id in data["moderators"] or is_admin(interaction, data)
 
-        maybe_button = discord.ui.Button(
-            label="⚠️ Vielleicht",
-            style=discord.ButtonStyle.blurple,
-            custom_id=f"maybe_{event_id}"
-        )
-        maybe_button.callback = self.maybe_event
 
-        decline_button = discord.ui.Button(
-            label="❌ Absagen",
-            style=discord.ButtonStyle.red,
-            custom_id=f"decline_{event_id}"
-        )
-        decline_button.callback = self.decline_event
+def is_admin(interaction: discord.Interaction, data: dict) -> bool:
+    # Server-Administratoren dürfen immer, damit neue Guilds ohne Vorab-Konfiguration starten können
+    if interaction.user.id in data["admins"]:
+        return True
+    permissions = getattr(interaction.user, "guild_permissions", None)
+    return permissions is not None and permissions.administrator
+
+# --- Cover-Bilder ---
+DEFAULT_COVER_IMAGE_URL = "https://cdn.discordapp.com/attachments/740231955731316796/1348899987785781258/Banner_fur_Events.png?ex=67d12482&is=67cfd302&hm=2b2dbede4f5e00f07da8346eccb2780bd2a06d976051b7371e731d452248b998&"
+ASSET_CACHE_DIR = "asset_cache"
+ASSET_CACHE_MAX_BYTES = 20 * 1024 * 1024
+# Fehlgeschlagene Downloads (z.B. abgelaufene CDN-Links) werden so lange nicht erneut versucht
+ASSET_FAILURE_TTL_SECONDS = 15 * 60
+
+
+class AssetCache:
+    """Lädt Cover-Bilder einmalig herunter und hält die Rohdaten für ``create_scheduled_event`` vor.
+
+    Einträge sind über den Content-Hash adressiert und liegen im Speicher sowie auf der Platte.
+    Wird ``max_bytes`` überschritten, fliegen die am längsten nicht genutzten Bilder raus.
+    Fehlgeschlagene Downloads merkt sich der Cache für ``failure_ttl`` Sekunden.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, failure_ttl: float = ASSET_FAILURE_TTL_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.failure_ttl = failure_ttl
+        self._entries: OrderedDict[str, int] = OrderedDict()  # Content-Hash -> Größe, in LRU-Reihenfolge
+        self._memory: dict[str, bytes] = {}  # Content-Hash -> Bilddaten
+        self._url_index: dict[str, str] = {}  # URL (ohne Query) -> Content-Hash
+        self._pending: dict[str, asyncio.Task] = {}
+        self._failed_until: dict[str, float] = {}  # URL (ohne Query) -> monotonic-Zeit des nächsten Versuchs
+
+    async def load(self):
+        await asyncio.to_thread(self._load_index)
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        for content_hash, size in index.get("entries", []):
+            if os.path.exists(self._file_path(content_hash)):
+                self._entries[content_hash] = size
+        self._url_index = {url: h for url, h in index.get("urls", {}).items() if h in self._entries}
 
-        self.add_item(join_button)
-        self.add_item(maybe_button)
-        self.add_item(decline_button)
+    def _write_index(self, index: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
 
-    async def join_event(self, interaction: discord.Interaction):
-        await self._handle_participation(interaction, "yes")
+    def _file_path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, f"{content_hash}.img")
 
-    async def maybe_event(self, interaction: discord.Interaction):
-        await self._handle_participation(interaction, "maybe")
+    def _read_file(self, content_hash: str):
+        try:
+            with open(self._file_path(content_hash), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_file(self, content_hash: str, image_bytes: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._file_path(content_hash), "wb") as f:
+            f.write(image_bytes)
+
+    @staticmethod
+    def _cache_key(url: str) -> str:
+        # Discord-CDN-Links enthalten wechselnde Signatur-Parameter, das Bild dahinter bleibt gleich
+        return url.split("?", 1)[0]
+
+    async def get_image(self, session: aiohttp.ClientSession, url: str):
+        key = self._cache_key(url)
+        content_hash = self._url_index.get(key)
+        if content_hash in self._entries:
+            self._entries.move_to_end(content_hash)
+            image_bytes = self._memory.get(content_hash)
+            if image_bytes is None:
+                image_bytes = await asyncio.to_thread(self._read_file, content_hash)
+            if image_bytes is not None:
+                self._memory[content_hash] = image_bytes
+                return image_bytes
+        if self._failed_until.get(key, 0) > time.monotonic():
+            return None
+
+        # Gleichzeitige Anfragen für dieselbe URL teilen sich einen Download
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.create_task(self._download(session, url, key))
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await task
+
+    async def _download(self, session: aiohttp.ClientSession, url: str, key: str):
+        try:
+            async with session.get(url) as resp:
+                if resp.status != 200:
+                    log.warning(f"Cover-Bild konnte nicht geladen werden ({resp.status}): {key}")
+                    self._failed_until[key] = time.monotonic() + self.failure_ttl
+                    return None
+                image_bytes = await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.error(f"Fehler beim Laden des Cover-Bildes: {e!r}")
+            self._failed_until[key] = time.monotonic() + self.failure_ttl
+            return None
+        self._failed_until.pop(key, None)
+
+        # discord.py erwartet die Rohdaten (bytes) und kodiert sie selbst
+        content_hash = hashlib.sha256(image_bytes).hexdigest()
+        if content_hash not in self._entries:
+            try:
+                await asyncio.to_thread(self._write_file, content_hash, image_bytes)
+            except OSError as e:
+                log.error(f"Fehler beim Schreiben des Asset-Caches: {e}")
+            self._entries[content_hash] = len(image_bytes)
+        self._memory[content_hash] = image_bytes
+        self._entries.move_to_end(content_hash)
+        self._url_index[key] = content_hash
+        await self._evict()
+        return image_bytes
+
+    async def _evict(self):
+        removed = []
+        while len(self._entries) > 1 and sum(self._entries.values()) > self.max_bytes:
+            content_hash, _ = self._entries.popitem(last=False)
+            self._memory.pop(content_hash, None)
+            removed.append(content_hash)
+        self._url_index = {url: h for url, h in self._url_index.items() if h in self._entries}
+        index = {"entries": list(self._entries.items()), "urls": dict(self._url_index)}
 
-    async def decline_event(self, interaction: discord.Interaction):
-        await self._handle_participation(interaction, "no")
+        def _apply():
+            for content_hash in removed:
+                try:
+                    os.remove(self._file_path(content_hash))
+                except OSError:
+                    pass
+            self._write_index(index)
+
+        try:
+            await asyncio.to_thread(_apply)
+        except OSError as e:
+            log.error(f"Fehler beim Schreiben des Asset-Caches: {e}")
+
+
+asset_cache = AssetCache(ASSET_CACHE_DIR, ASSET_CACHE_MAX_BYTES)
+
+
+def _cover_image_url(data: dict, game: str) -> str:
+    # Spiel-Banner vor Server-Banner vor Standard-Banner
+    game_banners = data.get("game_cover_images", {})
+    return game_banners.get(game.strip().lower()) or data.get("cover_image_url") or DEFAULT_COVER_IMAGE_URL
+
+# --- Persistente Event-Buttons ---
+# Ein einziger dynamischer Handler für alle Events – die Event-ID steckt in der custom_id
+PARTICIPATION_BUTTONS = {
+    "join": ("✅ Teilnehmen", discord.ButtonStyle.green, "yes"),
+    "maybe": ("⚠️ Vielleicht", discord.ButtonStyle.blurple, "maybe"),
+    "decline": ("❌ Absagen", discord.ButtonStyle.red, "no"),
+}
+
+
+class ParticipationButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"(?P<action>join|maybe|decline)_(?P<event_id>\d+)"
+):
+    def __init__(self, action: str, event_id: str, disabled: bool = False):
+        label, style, _ = PARTICIPATION_BUTTONS[action]
+        super().__init__(discord.ui.Button(
+            label=label,
+            style=style,
+            custom_id=f"{action}_{event_id}",
+            disabled=disabled
+        ))
+        self.action = action
+        self.event_id = event_id
 
-    async def _handle_participation(self, interaction: discord.Interaction, choice: str):
-        data = load_data()
-        event = data["events"].get(self.event_id)
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], match["event_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        await _handle_participation(interaction, self.event_id, PARTICIPATION_BUTTONS[self.action][2])
+
+
+class ParticipantListButton(discord.ui.DynamicItem[discord.ui.Button], template=r"list_(?P<event_id>\d+)"):
+    def __init__(self, event_id: str, disabled: bool = False):
+        super().__init__(discord.ui.Button(
+            label="👥 Alle anzeigen",
+            style=discord.ButtonStyle.grey,
+            custom_id=f"list_{event_id}",
+            disabled=disabled
+        ))
+        self.event_id = event_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["event_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        event = load_data(interaction.guild_id)["events"].get(self.event_id)
         if not event:
             await interaction.response.send_message("❌ Event nicht gefunden!", ephemeral=True)
             return
-        user_id = interaction.user.id
+        view = ParticipantPagesView(event["title"], embed_renderer.pages(self.event_id, event))
+        await interaction.response.send_message(embed=view.embed(), view=view, ephemeral=True)
+
+
+def event_buttons(event_id: str, disabled: bool = False) -> discord.ui.View:
+    view = discord.ui.View(timeout=None)  # persistent: kein Timeout
+    for action in PARTICIPATION_BUTTONS:
+        view.add_item(ParticipationButton(action, event_id, disabled=disabled))
+    view.add_item(ParticipantListButton(event_id, disabled=disabled))
+    return view
+
+
+PAGES_VIEW_TIMEOUT_SECONDS = 300
+
+
+class ParticipantPagesView(discord.ui.View):
+    """Blättert durch die vorberechneten Teilnehmerseiten eines Events (nur für den Aufrufer sichtbar)."""
+
+    def __init__(self, title: str, pages: list):
+        super().__init__(timeout=PAGES_VIEW_TIMEOUT_SECONDS)
+        self.title = title
+        self.pages = pages
+        self.index = 0
+        self._update_buttons()
+
+    def embed(self) -> discord.Embed:
+        embed = discord.Embed(title=f"👥 Teilnehmer: {self.title}", description=self.pages[self.index], color=discord.Color.blue())
+        embed.set_footer(text=f"Seite {self.index + 1}/{len(self.pages)}")
+        return embed
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.index >= len(self.pages) - 1
+
+    async def _show(self, interaction: discord.Interaction, index: int):
+        self.index = index
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="◀️", style=discord.ButtonStyle.grey)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.index - 1)
+
+    @discord.ui.button(label="▶️", style=discord.ButtonStyle.grey)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.index + 1)
+
+
+async def _handle_participation(interaction: discord.Interaction, event_id: str, choice: str):
+    # Sofort bestätigen – die eigentliche Verarbeitung übernimmt die Queue des Events
+    await interaction.response.defer()
+    await participation_queue.submit(event_id, interaction, choice)
+
+
+# --- Embeds ---
+TIME_FORMAT = "%d.%m.%Y %H:%M"
+PARTICIPANT_FIELDS = (("yes", "✅ Zusagen"), ("maybe", "⚠️ Vielleicht"), ("no", "❌ Absagen"))
+PARTICIPANT_LABELS = {**dict(PARTICIPANT_FIELDS), "waiting": "⏳ Warteliste"}
+# Discord-Limits: 1024 Zeichen pro Feld, 4096 pro Beschreibung, 6000 pro Embed.
+# Die Längenbegrenzung der statischen Felder hält das Embed mit drei vollen Teilnehmerfeldern unter 6000
+FIELD_VALUE_LIMIT = 1024
+STATIC_FIELD_LIMITS = {"game": 256, "description": FIELD_VALUE_LIMIT, "rulebook": 512}
+PAGE_SIZE = 25
+
+
+def event_start(event: dict) -> datetime:
+    return datetime.fromtimestamp(event["start_ts"], ZoneInfo(event["timezone"]))
+
+
+def format_event_time(event: dict) -> str:
+    return event_start(event).strftime(TIME_FORMAT)
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _mention_list(user_ids, total: int, limit: int = FIELD_VALUE_LIMIT) -> str:
+    """Erwähnungen bis zur Feldgrenze; der Rest wird nur gezählt, damit große Events billig bleiben."""
+    if not total:
+        return "Keine"
+    text = ""
+    shown = 0
+    # Platz für den Hinweis auf die restlichen Einträge freihalten
+    budget = limit - len(f"\n… und {total} weitere")
+    for user_id in user_ids:
+        mention = f"<@{user_id}>"
+        if len(text) + len(mention) + 2 > budget:
+            return f"{text}\n… und {total - shown} weitere"
+        text = f"{text}, {mention}" if text else mention
+        shown += 1
+    return text
+
+
+class EmbedRenderer:
+    """Baut alle Event-Embeds an einer Stelle.
+
+    Die statischen Felder eines Events werden zwischengespeichert, die Teilnehmerlisten nur neu
+    zusammengesetzt, wenn sich die Version der Participants geändert hat.
+    """
+
+    def __init__(self):
+        self._static: dict[str, tuple] = {}  # event_id -> (Schlüssel, Felder)
+        self._mentions: dict[str, tuple] = {}  # event_id -> (Schlüssel, {Kategorie: Text})
+        self._pages: dict[str, tuple] = {}  # event_id -> (Schlüssel, Seiten)
+
+    def forget(self, event_id: str):
+        self._static.pop(event_id, None)
+        self._mentions.pop(event_id, None)
+        self._pages.pop(event_id, None)
+
+    def _static_fields(self, event_id: str, event: dict) -> list:
+        key = (
+            event["title"], event["start_ts"], event.get("end_ts"), event["timezone"],
+            event["game"], event["max_players"], event["description"], event["rulebook"]
+        )
+        cached = self._static.get(event_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        relative_timestamp = f"<t:{event['start_ts']}:R>"
+        fields = [
+            ("📅 Datum & Uhrzeit", f"{format_event_time(event)}\n{relative_timestamp}", True),
+            ("🎮 Spiel", _clip(event["game"], STATIC_FIELD_LIMITS["game"]), True),
+            ("👥 Max. Spieler", str(event["max_players"]), True),
+        ]
+        if event.get("end_ts") is not None:
+            duration_minutes = (event["end_ts"] - event["start_ts"]) // 60
+            fields.append(("⏳ Dauer", f"{duration_minutes} Minuten", True))
+        fields.append(("📜 Beschreibung", _clip(event["description"], STATIC_FIELD_LIMITS["description"]), False))
+        if event["rulebook"]:
+            fields.append(("📌 Regelwerk / Link", _clip(event["rulebook"], STATIC_FIELD_LIMITS["rulebook"]), False))
+        self._static[event_id] = (key, fields)
+        return fields
+
+    def _mention_texts(self, event_id: str, event: dict) -> dict:
         participants = event["participants"]
+        key = (id(participants), participants.version)
+        cached = self._mentions.get(event_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        texts = {
+            category: _mention_list(participants[category], len(participants[category]))
+            for category in Participants.CATEGORIES
+        }
+        self._mentions[event_id] = (key, texts)
+        return texts
 
-        # Entferne den User aus allen Kategorien
-        for category in ["yes", "maybe", "no", "waiting"]:
-            if user_id in participants[category]:
-                participants[category].remove(user_id)
+    def _field_names(self, event: dict) -> dict:
+        participants = event["participants"]
+        yes_name = f"{PARTICIPANT_LABELS['yes']} ({len(participants['yes'])}/{event['max_players']})"
+        if participants["waiting"]:
+            yes_name += f" · {len(participants['waiting'])} wartend"
+        return {
+            "yes": yes_name,
+            "maybe": f"{PARTICIPANT_LABELS['maybe']} ({len(participants['maybe'])})",
+            "no": f"{PARTICIPANT_LABELS['no']} ({len(participants['no'])})",
+            "waiting": f"{PARTICIPANT_LABELS['waiting']} ({len(participants['waiting'])})",
+        }
 
-        if choice == "yes":
-            if len(participants["yes"]) >= event["max_players"]:
-                # Wenn das Event voll ist, in die neue Kategorie "waiting" einfügen
-                if user_id not in participants["waiting"]:
-                    participants["waiting"].append(user_id)
-                event["participants"] = participants
-                data["events"][self.event_id] = event
-                save_data(data)
-                await interaction.response.send_message("ℹ️ Event ist voll – du wurdest auf die Warteliste gesetzt.", ephemeral=True)
-                return
-            else:
-                if user_id not in participants["yes"]:
-                    participants["yes"].append(user_id)
-        else:
-            if user_id not in participants[choice]:
-                participants[choice].append(user_id)
+    def pages(self, event_id: str, event: dict) -> list:
+        """Vollständige Teilnehmerliste, in Seiten zu je PAGE_SIZE Einträgen vorberechnet."""
+        participants = event["participants"]
+        key = (id(participants), participants.version)
+        cached = self._pages.get(event_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        names = self._field_names(event)
+        lines = []
+        for category in ("yes", "waiting", "maybe", "no"):
+            if participants[category]:
+                lines.append(f"**{names[category]}**")
+                lines.extend(f"{i}. <@{uid}>" for i, uid in enumerate(participants[category], start=1))
+        pages = ["\n".join(lines[i:i + PAGE_SIZE]) for i in range(0, len(lines), PAGE_SIZE)] or ["Noch keine Teilnehmer."]
+        self._pages[event_id] = (key, pages)
+        return pages
+
+    def render(self, event_id: str, event: dict):
+        if event.get("start_ts") is None:
+            return None
+        embed = discord.Embed(title=event["title"], color=discord.Color.blue())
+        for name, value, inline in self._static_fields(event_id, event):
+            embed.add_field(name=name, value=value, inline=inline)
+        mentions = self._mention_texts(event_id, event)
+        names = self._field_names(event)
+        for category, _ in PARTICIPANT_FIELDS:
+            embed.add_field(name=names[category], value=mentions[category], inline=True)
+        return embed
+
+    def render_start(self, event_id: str, event: dict):
+        # Start-Ankündigung inklusive der Warteliste (Kategorie "waiting")
+        mentions = self._mention_texts(event_id, event)
+        names = self._field_names(event)
+        embed = discord.Embed(
+            title="Event Start",
+            description=f"🎮 **{event['title']}** startet jetzt!",
+            color=discord.Color.green()
+        )
+        embed.add_field(name=names["yes"].split(" · ")[0], value=mentions["yes"], inline=True)
+        embed.add_field(name=names["waiting"], value=mentions["waiting"], inline=True)
+        return embed
+
+
+embed_renderer = EmbedRenderer()
+
+
+# --- Interaktions-Queue pro Event ---
+EDIT_WINDOW_SECONDS = 1.0
+# Wer in dieser Zeit vor dem Start seine Zusage zurückzieht, zählt in der Statistik als No-Show
+LATE_CANCELLATION_SECONDS = 3600
 
-        event["participants"] = participants
-        data["events"][self.event_id] = event
-        save_data(data)
 
-        # Aktualisiere das Embed
+def _track_late_cancellation(event: dict, user_id: int, previous: str | None):
+    if previous != "yes" or event["participants"].state_of(user_id) == "yes" or event.get("start_ts") is None:
+        return
+    if time.time() >= event["start_ts"] - LATE_CANCELLATION_SECONDS:
+        late = event.setdefault("late_cancellations", [])
+        if user_id not in late:
+            late.append(user_id)
+
+
+class ParticipationQueue:
+    """Ein Worker pro Event: wendet Klicks der Reihe nach an und bündelt die Nachrichten-Edits."""
+
+    def __init__(self, edit_window: float = EDIT_WINDOW_SECONDS):
+        self.edit_window = edit_window
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def lock(self, event_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(event_id, asyncio.Lock())
+
+    def forget(self, event_id: str):
+        self._locks.pop(event_id, None)
+
+    async def submit(self, event_id: str, interaction: discord.Interaction, choice: str):
+        queue = self._queues.setdefault(event_id, asyncio.Queue())
+        queue.put_nowait((interaction, choice, time.perf_counter()))
+        if event_id not in self._workers:
+            self._workers[event_id] = asyncio.create_task(self._worker(event_id, queue))
+
+    async def drain(self):
+        # Wartet, bis alle offenen Klicks verarbeitet sind
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
+
+    async def _worker(self, event_id: str, queue: asyncio.Queue):
         try:
-            event_datetime = datetime.strptime(event["time"], "%d.%m.%Y %H:%M")
-            local_tz = datetime.now().astimezone().tzinfo
-            event_datetime = event_datetime.replace(tzinfo=local_tz)
-        except ValueError:
-            await interaction.response.send_message("❌ Fehler beim Parsen des Datums.", ephemeral=True)
+            while not queue.empty():
+                batch = [queue.get_nowait() for _ in range(queue.qsize())]
+                try:
+                    await self._process(event_id, batch)
+                except Exception as e:
+                    log.error(f"Fehler beim Verarbeiten der Teilnahmen für Event {event_id}: {e}")
+                # Klicks, die während des Fensters eingehen, landen gesammelt im nächsten Edit
+                await asyncio.sleep(self.edit_window)
+        finally:
+            self._workers.pop(event_id, None)
+            self._queues.pop(event_id, None)
+            # Der Lock bleibt bis zum Ende des Events bestehen: native RSVPs können ihn gerade halten
+
+    async def _process(self, event_id: str, batch: list):
+        guild_id = batch[0][0].guild_id
+        data = load_data(guild_id)
+        # Den Lock erst für bekannte Events anlegen, sonst bliebe er für unbekannte IDs für immer liegen
+        if event_id not in data["events"]:
+            await self._reply_not_found(batch)
             return
+        async with self.lock(event_id):
+            event = data["events"].get(event_id)
+            if not event:
+                await self._reply_not_found(batch)
+                return
+            waitlisted = []
+            promoted = []
+            for interaction, choice, _ in batch:
+                previous = event["participants"].state_of(interaction.user.id)
+                state, moved_up = event["participants"].set_choice(interaction.user.id, choice, event["max_players"])
+                _track_late_cancellation(event, interaction.user.id, previous)
+                if choice == "yes" and state == "waiting":
+                    waitlisted.append(interaction)
+                promoted.extend(moved_up)
+            # Wer im selben Batch nachrückt und danach wieder absagt, wird nicht benachrichtigt
+            promoted = [uid for uid in dict.fromkeys(promoted) if event["participants"].state_of(uid) == "yes"]
+            save_data(guild_id, event_id)
+            native_sync.touch(guild_id, event_id)
+            embed = embed_renderer.render(event_id, event)
+            title = event["title"]
+
+        last_interaction = batch[-1][0]
+        if embed is None:
+            await last_interaction.followup.send("❌ Fehler beim Parsen des Datums.", ephemeral=True)
+            return
+        notices = [
+            interaction.followup.send("ℹ️ Event ist voll – du wurdest auf die Warteliste gesetzt.", ephemeral=True)
+            for interaction in waitlisted
+        ]
+        if promoted:
+            mentions = ', '.join(f'<@{uid}>' for uid in promoted)
+            notices.append(last_interaction.channel.send(
+                f"🎉 {mentions} – du bist von der Warteliste nachgerückt und nimmst an **{title}** teil!"
+            ))
+        # Die Buttons mitschicken, damit auch ältere Event-Nachrichten den "Alle anzeigen"-Button erhalten
+        view = event_buttons(event_id)
+        await asyncio.gather(last_interaction.edit_original_response(embed=embed, view=view), *notices)
+
+        # Latenz vom Klick bis zur sichtbaren Aktualisierung, je Button
+        finished = time.perf_counter()
+        for _, choice, received_at in batch:
+            metrics.observe("pepega_interaction_seconds", finished - received_at, button=choice)
+        metrics.inc("pepega_participation_clicks_total", len(batch))
+        metrics.inc("pepega_participation_edits_total")
+
+
+    @staticmethod
+    async def _reply_not_found(batch: list):
+        await asyncio.gather(*(
+            interaction.followup.send("❌ Event nicht gefunden!", ephemeral=True)
+            for interaction, _, _ in batch
+        ), return_exceptions=True)
 
-        formatted_datetime = event_datetime.strftime("%d.%m.%Y %H:%M")
-        relative_timestamp = f"<t:{int(event_datetime.timestamp())}:R>"
-        embed = discord.Embed(title=event["title"], color=discord.Color.blue())
-        embed.add_field(name="📅 Datum & Uhrzeit", value=f"{formatted_datetime}\n{relative_timestamp}", inline=True)
-        embed.add_field(name="🎮 Spiel", value=event["game"], inline=True)
-        embed.add_field(name="👥 Max. Spieler", value=str(event["max_players"]), inline=True)
-        if "end_time" in event:
-            duration_minutes = int((datetime.strptime(event["end_time"], "%d.%m.%Y %H:%M").replace(
-                tzinfo=local_tz) - event_datetime).total_seconds() // 60)
-            embed.add_field(name="⏳ Dauer", value=f"{duration_minutes} Minuten", inline=True)
-        embed.add_field(name="📜 Beschreibung", value=event["description"], inline=False)
-        if event["rulebook"]:
-            embed.add_field(name="📌 Regelwerk / Link", value=event["rulebook"], inline=False)
-        yes_mentions = ', '.join([f'<@{uid}>' for uid in event["participants"]["yes"]]) or "Keine"
-        maybe_mentions = ', '.join([f'<@{uid}>' for uid in event["participants"]["maybe"]]) or "Keine"
-        waiting_mentions = ', '.join([f'<@{uid}>' for uid in event["participants"]["waiting"]]) or "Keine"
-        no_mentions = ', '.join([f'<@{uid}>' for uid in event["participants"]["no"]]) or "Keine"
-        embed.add_field(name="✅ Zusagen", value=yes_mentions, inline=True)
-        embed.add_field(name="⚠️ Vielleicht", value=maybe_mentions, inline=True)
-        embed.add_field(name="❌ Absagen", value=no_mentions, inline=True)
-        # Optional: Im Update-Embed kann man die Warteliste auch anzeigen, hier erfolgt dies nicht zwingend
-        await interaction.response.edit_message(embed=embed)
+
+participation_queue = ParticipationQueue()
 
 # --- Modale zur Event-Erstellung ---
 
@@ -198,11 +703,10 @@ class EventModalDetails(discord.ui.Modal, title="Event-Erstellung (2/2)"):
         try:
             event_datetime = datetime.strptime(
                 self.basic_data["date"].strip() + " " + self.basic_data["time"].strip(),
-                "%d.%m.%Y %H:%M"
+                TIME_FORMAT
             )
-            # Mache das Datum "aware" indem du die lokale Zeitzone setzt
-            local_tz = datetime.now().astimezone().tzinfo
-            event_datetime = event_datetime.replace(tzinfo=local_tz)
+            # Eingabe gilt in der Event-Zeitzone; gespeichert wird nur der Zeitstempel
+            event_datetime = event_datetime.replace(tzinfo=ZoneInfo(EVENT_TIMEZONE))
         except ValueError:
             await interaction.response.send_message(
                 "❌ Ungültiges Datums- oder Zeitformat! Bitte nutze DD.MM.JJJJ für das Datum und HH:MM für die Uhrzeit.",
@@ -230,121 +734,311 @@ class EventModalDetails(discord.ui.Modal, title="Event-Erstellung (2/2)"):
             except ValueError:
                 await interaction.response.send_message("❌ Rundendauer muss eine Zahl (Minuten) sein.", ephemeral=True)
                 return
-            end_datetime = event_datetime + timedelta(minutes=duration_minutes)
         else:
             duration_minutes = None
 
-        data = load_data()
+        guild_id = interaction.guild_id
+        data = load_data(guild_id)
         event_id = str(interaction.id)
         # Teilnehmer-Datenstruktur mit neuer Kategorie "waiting" initialisieren
         event_data = {
             "title": self.basic_data["title"],
-            "time": event_datetime.strftime("%d.%m.%Y %H:%M"),
+            "start_ts": int(event_datetime.timestamp()),
+            "timezone": EVENT_TIMEZONE,
             "game": self.game_title.value,
             "max_players": max_players,
             "description": self.description.value,
             "rulebook": self.rulebook.value,
-            "participants": {"yes": [], "maybe": [], "no": [], "waiting": []},
+            "participants": Participants(),
             "message_id": None,
-            "channel_id": interaction.channel.id  # Speichere den Channel, in dem das Event erstellt wurde
+            "channel_id": interaction.channel.id,  # Speichere den Channel, in dem das Event erstellt wurde
+            "guild_id": guild_id
         }
         if duration_minutes is not None:
-            event_data["end_time"] = (event_datetime + timedelta(minutes=duration_minutes)).strftime("%d.%m.%Y %H:%M")
+            event_data["end_ts"] = event_data["start_ts"] + duration_minutes * 60
         data["events"][event_id] = event_data
-        save_data(data)
+        save_data(guild_id, event_id)
+        scheduler.schedule(guild_id, event_id, event_data)
 
         # Sende zuerst die Custom Event Nachricht, um den Nachrichtenlink (jump_url) zu erhalten
-        view = EventButtons(event_id)
-        await interaction.response.send_message(embed=self._build_embed(event_data, event_datetime, duration_minutes), view=view)
+        view = event_buttons(event_id)
+        await interaction.response.send_message(embed=embed_renderer.render(event_id, event_data), view=view)
         message = await interaction.original_response()
         message_link = message.jump_url
 
-        # Erstelle nun den nativen Discord-Event – unter Verwendung des Nachrichtenlinks
-        guild = interaction.guild
-        start_time = event_datetime
-        end_time = start_time + timedelta(hours=2)
-        event_name = event_data["title"]
-        base_event_description = f"{event_data['game']}\n\n{event_data['description']}"
-        participant_counts = "✅ Zusagen: 0\n⚠️ Vielleicht: 0\n❌ Absagen: 0"
-        updated_event_description = f"{base_event_description}\n\n{participant_counts}\n\n\nEventdetails and Anmeldelink: {message_link}"
-
-        cover_image_url = "https://cdn.discordapp.com/attachments/740231955731316796/1348899987785781258/Banner_fur_Events.png?ex=67d12482&is=67cfd302&hm=2b2dbede4f5e00f07da8346eccb2780bd2a06d976051b7371e731d452248b998&"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(cover_image_url) as resp:
-                if resp.status == 200:
-                    image_bytes = await resp.read()
-                    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-                    image_data = f"data:image/png;base64,{image_base64}"
-                else:
-                    image_data = None
-
-        params = {
-            "name": event_name,
-            "start_time": start_time,
-            "end_time": end_time,
-            "privacy_level": discord.PrivacyLevel.guild_only,
-            "entity_type": discord.EntityType.external,
-            "description": updated_event_description,
-            "location": message_link
-        }
-        if image_data is not None:
-            params["image"] = image_data
+        await publish_native_event(interaction.guild, event_id, event_data, message)
 
-        try:
-            scheduled_event = await guild.create_scheduled_event(**params)
-        except Exception as e:
-            log.error(f"Fehler beim Erstellen des Discord-Events: {e}")
-            scheduled_event = None
+async def publish_native_event(guild: discord.Guild, event_id: str, event_data: dict, message: discord.Message):
+    """Legt zur bereits gesendeten Event-Nachricht das native Discord-Event an und verknüpft beide."""
+    guild_id = guild.id
+    data = load_data(guild_id)
+    message_link = message.jump_url
 
-        if scheduled_event:
-            event_link_native = f"https://discord.com/events/{guild.id}/{scheduled_event.id}"
-        else:
-            event_link_native = "Fehler beim Erstellen des Discord-Events."
-
-        # Aktualisiere Eventdaten mit Nachrichten-ID und nativen Event-Link
-        data = load_data()
-        data["events"][event_id]["message_id"] = message.id
-        data["events"][event_id]["discord_event_link"] = event_link_native
-        data["events"][event_id]["discord_event_id"] = scheduled_event.id if scheduled_event else None
-        data["events"][event_id]["message_link"] = message.jump_url
-        save_data(data)
-
-        # Sende den nativen Event-Link in den konfigurierten Channel, falls gesetzt
-        event_channel_id = data.get("event_channel_id")
-        if event_channel_id:
-            event_channel = guild.get_channel(event_channel_id)
-            if event_channel:
-                await event_channel.send(f"Neues Discord-Event erstellt: {event_link_native}")
-        else:
-            log.warning("Kein Event-Channel in den Daten hinterlegt.")
-
-    def _build_embed(self, event_data, event_datetime, duration_minutes):
-        formatted_datetime = event_datetime.strftime("%d.%m.%Y %H:%M")
-        relative_timestamp = f"<t:{int(event_datetime.timestamp())}:R>"
-        embed = discord.Embed(title=event_data["title"], color=discord.Color.blue())
-        embed.add_field(name="📅 Datum & Uhrzeit", value=f"{formatted_datetime}\n{relative_timestamp}", inline=True)
-        embed.add_field(name="🎮 Spiel", value=event_data["game"], inline=True)
-        embed.add_field(name="👥 Max. Spieler", value=str(event_data["max_players"]), inline=True)
-        if duration_minutes is not None:
-            embed.add_field(name="⏳ Dauer", value=f"{duration_minutes} Minuten", inline=True)
-        embed.add_field(name="📜 Beschreibung", value=event_data["description"], inline=False)
-        if event_data["rulebook"]:
-            embed.add_field(name="📌 Regelwerk / Link", value=event_data["rulebook"], inline=False)
-        embed.add_field(name="✅ Zusagen", value="Noch keine", inline=True)
-        embed.add_field(name="⚠️ Vielleicht", value="Noch keine", inline=True)
-        embed.add_field(name="❌ Absagen", value="Noch keine", inline=True)
-        return embed
+    # Erstelle nun den nativen Discord-Event – unter Verwendung des Nachrichtenlinks
+    start_time = event_start(event_data)
+    end_time = start_time + timedelta(hours=2)
+    event_name = event_data["title"]
+    base_event_description = f"{event_data['game']}\n\n{event_data['description']}"
+    participant_counts = "✅ Zusagen: 0\n⚠️ Vielleicht: 0\n❌ Absagen: 0"
+    updated_event_description = f"{base_event_description}\n\n{participant_counts}\n\n\nEventdetails and Anmeldelink: {message_link}"
+
+    cover_image_url = _cover_image_url(data, event_data["game"])
+    image_data = await asset_cache.get_image(client.http_session, cover_image_url)
+
+    params = {
+        "name": event_name,
+        "start_time": start_time,
+        "end_time": end_time,
+        "privacy_level": discord.PrivacyLevel.guild_only,
+        "entity_type": discord.EntityType.external,
+        "description": updated_event_description,
+        "location": message_link
+    }
+    if image_data is not None:
+        params["image"] = image_data
+
+    try:
+        scheduled_event = await sweep.call(
+            f"scheduled_events:{guild_id}", lambda: guild.create_scheduled_event(**params)
+        )
+    except Exception as e:
+        log.error(f"Fehler beim Erstellen des Discord-Events: {e}")
+        scheduled_event = None
+
+    if scheduled_event:
+        event_link_native = f"https://discord.com/events/{guild_id}/{scheduled_event.id}"
+    else:
+        event_link_native = "Fehler beim Erstellen des Discord-Events."
+
+    # Das Event kann inzwischen gestartet oder abgesagt worden sein
+    if event_id not in data["events"]:
+        return
+    # Aktualisiere Eventdaten mit Nachrichten-ID und nativen Event-Link
+    event_data["message_id"] = message.id
+    event_data["discord_event_link"] = event_link_native
+    event_data["discord_event_id"] = scheduled_event.id if scheduled_event else None
+    event_data["message_link"] = message.jump_url
+    save_data(guild_id, event_id)
+    index_native_event(guild_id, event_id, event_data)
+
+    # Sende den nativen Event-Link in den konfigurierten Channel, falls gesetzt
+    event_channel_id = data.get("event_channel_id")
+    if event_channel_id:
+        event_channel = guild.get_channel(event_channel_id)
+        if event_channel:
+            try:
+                await sweep.call(
+                    f"channel:{event_channel_id}",
+                    lambda: event_channel.send(f"Neues Discord-Event erstellt: {event_link_native}")
+                )
+            except Exception as e:
+                log.error(f"Fehler beim Senden des Event-Links für Event {event_id}: {e}")
+    else:
+        log.warning(f"Kein Event-Channel für Guild {guild_id} hinterlegt.")
+
+
+# --- Event-Serien ---
+SERIES_INTERVALS = {"weekly": 1, "biweekly": 2}
+MAX_SERIES_WEEKS = 52
+_event_id_counter = itertools.count()
+
+
+def new_event_id() -> str:
+    # Snowflake der aktuellen Zeit; die unteren Bits trennen mehrere IDs derselben Millisekunde
+    return str(discord.utils.time_snowflake(discord.utils.utcnow()) | (next(_event_id_counter) % 4096))
+
+
+def _occurrence_start(series: dict, index: int) -> int:
+    # Wanduhrzeit bleibt über Sommer-/Winterzeit hinweg gleich
+    tz = ZoneInfo(series["timezone"])
+    first = datetime.fromtimestamp(series["first_start_ts"], tz).replace(tzinfo=None)
+    start = first + timedelta(weeks=index * series["interval_weeks"])
+    return int(start.replace(tzinfo=tz).timestamp())
+
+
+def _occurrence_event(guild_id: int, series_id: str, series: dict, start_ts: int) -> dict:
+    event = {
+        "title": series["title"],
+        "start_ts": start_ts,
+        "timezone": series["timezone"],
+        "game": series["game"],
+        "max_players": series["max_players"],
+        "description": series["description"],
+        "rulebook": series["rulebook"],
+        "participants": Participants(),
+        "message_id": None,
+        "channel_id": series["channel_id"],
+        "guild_id": guild_id,
+        "series_id": series_id
+    }
+    if series.get("duration_minutes") is not None:
+        event["end_ts"] = start_ts + series["duration_minutes"] * 60
+    return event
+
+
+async def _publish_occurrence(guild: discord.Guild, event_id: str, event: dict):
+    channel = guild.get_channel(event["channel_id"])
+    if channel is None:
+        log.warning(f"Channel {event['channel_id']} für Serien-Event {event_id} nicht gefunden.")
+        return
+    embed = embed_renderer.render(event_id, event)
+    view = event_buttons(event_id)
+    # Fehler bleiben beim einzelnen Termin, damit die übrigen Termine trotzdem angelegt werden
+    try:
+        message = await sweep.call(f"channel:{channel.id}", lambda: channel.send(embed=embed, view=view))
+        await publish_native_event(guild, event_id, event, message)
+    except Exception as e:
+        log.error(f"Fehler beim Veröffentlichen des Serien-Events {event_id}: {e}")
+        metrics.inc("pepega_sweep_errors_total", task="series")
+
+
+async def extend_series(guild: discord.Guild, only: str = None) -> int:
+    """Legt alle Serientermine im rollierenden Fenster an; die Discord-Aufrufe laufen parallel über ``sweep``.
+
+    Mit ``only`` wird nur die Serie mit dieser ID erweitert.
+    """
+    data = load_data(guild.id)
+    if not data.get("series"):
+        return 0
+    now = time.time()
+    horizon = now + SERIES_WINDOW_DAYS * 86400
+    created = []
+    changed = False
+    # Termine werden vor dem ersten await reserviert, damit parallele Läufe nichts doppelt anlegen
+    for series_id, series in list(data["series"].items()):
+        if only is not None and series_id != only:
+            continue
+        while True:
+            start_ts = _occurrence_start(series, series["next_index"])
+            if start_ts > series["until_ts"]:
+                del data["series"][series_id]
+                changed = True
+                break
+            if start_ts > horizon:
+                break
+            series["next_index"] += 1
+            changed = True
+            if start_ts <= now:
+                continue
+            event_id = new_event_id()
+            event = _occurrence_event(guild.id, series_id, series, start_ts)
+            data["events"][event_id] = event
+            save_data(guild.id, event_id)
+            scheduler.schedule(guild.id, event_id, event)
+            created.append((event_id, event))
+    if changed:
+        save_data(guild.id)
+    if created:
+        await asyncio.gather(*(_publish_occurrence(guild, event_id, event) for event_id, event in created))
+        metrics.inc("pepega_series_events_created_total", len(created))
+    return len(created)
 
 # --- Slash-Befehle ---
 
+async def ensure_deferred(interaction: discord.Interaction, ephemeral: bool = True):
+    # Vor jedem Warten auf den Storage bestätigen, damit das 3-Sekunden-Fenster nie gerissen wird
+    if not interaction.response.is_done():
+        await interaction.response.defer(ephemeral=ephemeral, thinking=True)
+
 @client.tree.command(name="event", description="Erstelle ein neues Event")
+@app_commands.guild_only()
 async def create_event(interaction: discord.Interaction):
     await interaction.response.send_modal(EventModalBasic())
 
+@client.tree.command(name="event_series", description="Legt eine wöchentliche oder zweiwöchentliche Event-Serie an")
+@app_commands.guild_only()
+@app_commands.describe(
+    title="Event-Titel",
+    date="Datum des ersten Termins (DD.MM.JJJJ)",
+    time_of_day="Uhrzeit (HH:MM)",
+    until="Letzter möglicher Termin (DD.MM.JJJJ)",
+    game="Spiel-Titel",
+    max_players="Max. Spieleranzahl",
+    duration="Rundendauer in Minuten",
+    description="Beschreibung",
+    rulebook="Regelwerk / Steam Link"
+)
+@app_commands.rename(time_of_day="time")
+@app_commands.choices(interval=[
+    app_commands.Choice(name="Wöchentlich", value="weekly"),
+    app_commands.Choice(name="Alle zwei Wochen", value="biweekly"),
+])
+async def create_event_series(
+    interaction: discord.Interaction,
+    title: str,
+    date: str,
+    time_of_day: str,
+    interval: app_commands.Choice[str],
+    until: str,
+    game: str,
+    max_players: app_commands.Range[int, 1],
+    description: str,
+    duration: app_commands.Range[int, 1] | None = None,
+    rulebook: str = ""
+):
+    data = load_data(interaction.guild_id)
+    if not is_moderator(interaction, data):
+        await interaction.response.send_message("❌ Du hast keine Berechtigung, diesen Befehl zu verwenden.", ephemeral=True)
+        return
+
+    tz = ZoneInfo(EVENT_TIMEZONE)
+    try:
+        first_start = datetime.strptime(f"{date.strip()} {time_of_day.strip()}", TIME_FORMAT).replace(tzinfo=tz)
+        # Der letzte Tag zählt vollständig mit
+        until_end = datetime.strptime(until.strip(), "%d.%m.%Y").replace(tzinfo=tz) + timedelta(days=1)
+    except ValueError:
+        await interaction.response.send_message(
+            "❌ Ungültiges Datums- oder Zeitformat! Bitte nutze DD.MM.JJJJ für das Datum und HH:MM für die Uhrzeit.",
+            ephemeral=True
+        )
+        return
+    if first_start <= datetime.now().astimezone():
+        await interaction.response.send_message(
+            "❌ Der erste Termin liegt in der Vergangenheit. Bitte eine zukünftige Zeit wählen.", ephemeral=True
+        )
+        return
+    if until_end <= first_start or until_end - first_start > timedelta(weeks=MAX_SERIES_WEEKS):
+        await interaction.response.send_message(
+            f"❌ Das Enddatum muss nach dem ersten Termin und höchstens {MAX_SERIES_WEEKS} Wochen später liegen.",
+            ephemeral=True
+        )
+        return
+
+    await ensure_deferred(interaction)
+    series_id = str(interaction.id)
+    series = {
+        "title": title,
+        "game": game,
+        "max_players": max_players,
+        "description": description,
+        "rulebook": rulebook,
+        "duration_minutes": duration,
+        "timezone": EVENT_TIMEZONE,
+        "first_start_ts": int(first_start.timestamp()),
+        "interval_weeks": SERIES_INTERVALS[interval.value],
+        "until_ts": int(until_end.timestamp()) - 1,
+        "next_index": 0,
+        "channel_id": interaction.channel.id,
+        "created_by": interaction.user.id
+    }
+    data.setdefault("series", {})[series_id] = series
+    save_data(interaction.guild_id)
+
+    total = 0
+    while _occurrence_start(series, total) <= series["until_ts"]:
+        total += 1
+    created = await extend_series(interaction.guild, series_id)
+    remaining = total - created
+    text = f"✅ Serie **{title}** angelegt: {created} von {total} Terminen erstellt."
+    if remaining:
+        text += f" Die übrigen {remaining} werden jeweils {SERIES_WINDOW_DAYS} Tage im Voraus angelegt."
+    await interaction.followup.send(text, ephemeral=True)
+
 @client.tree.command(name="set_permissions", description="Verwalte die Bot Rechte. Nutze: `admin`, `moderator`")
+@app_commands.guild_only()
 async def set_permissions(interaction: discord.Interaction, user: discord.User, role: str):
-    data = load_data()
-    if interaction.user.id not in data["admins"]:
+    data = load_data(interaction.guild_id)
+    if not is_admin(interaction, data):
         await interaction.response.send_message("❌ Du hast keine Berechtigung, diesen Befehl zu verwenden.", ephemeral=True)
         return
     role_lower = role.lower()
@@ -368,107 +1062,677 @@ async def set_permissions(interaction: discord.Interaction, user: discord.User,
     else:
         await interaction.response.send_message("❌ Ungültige Rolle! Nutze 'admin' oder 'moderator'.", ephemeral=True)
         return
-    save_data(data)
+    save_data(interaction.guild_id)
     await interaction.response.send_message(f"✅ {user.mention} wurde als {role_name} hinzugefügt!", ephemeral=True)
 
 @client.tree.command(name="set_event_channel", description="Setzt den Channel, in dem Discord-Event-Links gepostet werden")
+@app_commands.guild_only()
 async def set_event_channel(interaction: discord.Interaction, channel: discord.TextChannel):
-    data = load_data()
-    if interaction.user.id not in data["admins"]:
+    data = load_data(interaction.guild_id)
+    if not is_admin(interaction, data):
         await interaction.response.send_message("❌ Du hast keine Berechtigung, diesen Befehl zu verwenden.", ephemeral=True)
         return
 
     data["event_channel_id"] = channel.id
-    save_data(data)
+    save_data(interaction.guild_id)
     await interaction.response.send_message(f"✅ Der Event Channel wurde auf {channel.mention} gesetzt.", ephemeral=True)
 
+@client.tree.command(name="set_event_banner", description="Setzt das Cover-Bild für Events (optional nur für ein bestimmtes Spiel)")
+@app_commands.guild_only()
+async def set_event_banner(interaction: discord.Interaction, url: str, game: str | None = None):
+    data = load_data(interaction.guild_id)
+    if not is_admin(interaction, data):
+        await interaction.response.send_message("❌ Du hast keine Berechtigung, diesen Befehl zu verwenden.", ephemeral=True)
+        return
+
+    # Das Bild wird direkt vorgeladen, damit spätere Event-Erstellungen es aus dem Cache bekommen
+    await ensure_deferred(interaction)
+    if await asset_cache.get_image(client.http_session, url) is None:
+        await interaction.followup.send("❌ Das Bild konnte nicht geladen werden.", ephemeral=True)
+        return
+
+    if game:
+        data.setdefault("game_cover_images", {})[game.strip().lower()] = url
+        target = f"das Spiel **{game}**"
+    else:
+        data["cover_image_url"] = url
+        target = "diesen Server"
+    save_data(interaction.guild_id)
+    await interaction.followup.send(f"✅ Das Event-Banner für {target} wurde gesetzt.", ephemeral=True)
+
+@client.tree.command(name="my_events", description="Zeigt die Events, für die du dich angemeldet hast")
+@app_commands.guild_only()
+async def my_events(interaction: discord.Interaction):
+    await ensure_deferred(interaction)
+    data = load_data(interaction.guild_id)
+    labels = {"yes": "✅ Zugesagt", "maybe": "⚠️ Vielleicht", "no": "❌ Abgesagt", "waiting": "⏳ Warteliste"}
+    lines = []
+    for event_id in await store.event_ids_for_user(interaction.user.id, interaction.guild_id):
+        event = data["events"].get(event_id)
+        if event:
+            state = event["participants"].state_of(interaction.user.id)
+            lines.append(f"**{event['title']}** ({format_event_time(event)}) – {labels[state]}")
+    if not lines:
+        await interaction.followup.send("Du bist aktuell für keine Events angemeldet.", ephemeral=True)
+        return
+    await interaction.followup.send("\n".join(lines), ephemeral=True)
+
+@client.tree.command(name="stats", description="Zeigt die Teilnahme-Statistik eines Spielers oder eines Spiels")
+@app_commands.guild_only()
+async def show_stats(interaction: discord.Interaction, user: discord.User | None = None, game: str | None = None):
+    # Liest nur die fortlaufend gepflegten Zähler – das Archiv wird dafür nie geöffnet
+    stats = store.stats(interaction.guild_id)
+    embed = discord.Embed(color=discord.Color.blue())
+    if game:
+        counters = stats.get("games", {}).get(game.strip().lower())
+        if not counters:
+            await interaction.response.send_message(f"Für **{game}** gibt es noch keine beendeten Events.", ephemeral=True)
+            return
+        events = counters["events"]
+        embed.title = f"📊 Statistik: {game}"
+        embed.add_field(name="🎮 Events", value=str(events), inline=True)
+        embed.add_field(name="✅ Teilnehmer Ø", value=f"{counters.get('attendees', 0) / events:.1f}", inline=True)
+        embed.add_field(name="⏳ Warteliste Ø", value=f"{counters.get('waitlisted', 0) / events:.1f}", inline=True)
+        embed.add_field(name="🚫 No-Shows", value=str(counters.get("no_shows", 0)), inline=True)
+    else:
+        user = user or interaction.user
+        counters = stats.get("users", {}).get(str(user.id), {})
+        attended = counters.get("attended", 0)
+        no_shows = counters.get("no_shows", 0)
+        total_events = stats.get("totals", {}).get("guild", {}).get("events", 0)
+        reliability = f"{attended / (attended + no_shows):.0%}" if attended + no_shows else "–"
+        embed.title = f"📊 Statistik: {user.display_name}"
+        embed.add_field(name="✅ Teilgenommen", value=f"{attended} von {total_events} Events", inline=True)
+        embed.add_field(name="🚫 No-Shows", value=str(no_shows), inline=True)
+        embed.add_field(name="⏳ Auf der Warteliste", value=str(counters.get("waitlisted", 0)), inline=True)
+        embed.add_field(name="🎯 Zuverlässigkeit", value=reliability, inline=True)
+    embed.set_footer(text=f"No-Show = Zusage weniger als {LATE_CANCELLATION_SECONDS // 60} Minuten vor Start zurückgezogen")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@client.tree.command(name="metrics", description="Zeigt eine Live-Übersicht der Bot-Metriken")
+@app_commands.guild_only()
+async def show_metrics(interaction: discord.Interaction):
+    data = load_data(interaction.guild_id)
+    if not is_admin(interaction, data):
+        await interaction.response.send_message("❌ Du hast keine Berechtigung, diesen Befehl zu verwenden.", ephemeral=True)
+        return
+
+    lines = metrics.summary() or ["Noch keine Messwerte vorhanden."]
+    text = ""
+    for line in lines:
+        # Discord erlaubt maximal 2000 Zeichen pro Nachricht
+        if len(text) + len(line) > 1900:
+            text += "…\n"
+            break
+        text += line + "\n"
+    await interaction.response.send_message(f"```\n{text}```", ephemeral=True)
+
 # --- Task: Überprüfung und Verwaltung von Events ---
-@tasks.loop(minutes=1)
-async def check_events():
-    now = datetime.now().astimezone()
-    guild = client.get_guild(GUILD_ID)
-    data = load_data()
-    for event_id, event in list(data["events"].items()):
-        # Aktualisiere die native Eventbeschreibung
+
+# --- Nebenläufige Hintergrundarbeit mit Rate-Limit-Backoff ---
+MAX_ROUTE_RETRIES = 3
+
+
+class SweepRunner:
+    """Begrenzt die Zahl gleichzeitiger REST-Aufrufe der Hintergrundarbeit.
+
+    Bei einem 429 pausiert nur die betroffene Route, alle anderen Events laufen weiter.
+    Kürzere Wartezeiten als ``MAX_RATELIMIT_TIMEOUT_SECONDS`` übernimmt discord.py selbst.
+    """
+
+    def __init__(self, concurrency: int):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._blocked_until: dict[str, float] = {}
+
+    async def call(self, route: str, factory):
+        for attempt in range(MAX_ROUTE_RETRIES + 1):
+            delay = self._blocked_until.get(route, 0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self._semaphore:
+                try:
+                    return await factory()
+                except discord.RateLimited as e:
+                    if attempt == MAX_ROUTE_RETRIES:
+                        raise
+                    retry_after = e.retry_after
+                except discord.HTTPException as e:
+                    # Nur 429 wiederholen: 5xx wiederholt discord.py bereits selbst, und ein erneutes
+                    # send/create nach einem bereits angenommenen Request würde doppelte Nachrichten erzeugen
+                    if attempt == MAX_ROUTE_RETRIES or e.status != 429:
+                        raise
+                    retry_after = float(e.response.headers.get("Retry-After", 2 ** attempt))
+            # Wartezeit außerhalb des Semaphors, damit andere Routen den Platz nutzen können
+            metrics.inc("pepega_route_backoff_total", route=route.split(":", 1)[0])
+            self._blocked_until[route] = max(self._blocked_until.get(route, 0), time.monotonic() + retry_after)
+
+
+sweep = SweepRunner(SWEEP_CONCURRENCY)
+
+# Fingerprint der zuletzt übertragenen Beschreibung je Event (nur im Speicher)
+native_description_fingerprints: dict[str, str] = {}
+
+
+def _native_event_description(event: dict) -> str:
+    yes_count = len(event["participants"]["yes"])
+    maybe_count = len(event["participants"]["maybe"])
+    no_count = len(event["participants"]["no"])
+    waiting_count = len(event["participants"]["waiting"])
+    participant_counts = f"✅ Zusagen: {yes_count}\n⚠️ Vielleicht: {maybe_count}\n❌ Absagen: {no_count}\n⏳ Warteliste: {waiting_count}"
+    base_event_description = f"{event['game']}\n\n{event['description']}"
+    message_link = event.get("message_link", "")
+    return f"{base_event_description}\n\n{participant_counts}\n\nEventdetails and Anmeldelink: {message_link}"
+
+
+async def sync_native_events(guild: discord.Guild, events: dict):
+    """Überträgt nur geänderte Beschreibungen an die nativen Discord-Events."""
+    pending = {}
+    for event_id, event in events.items():
+        if not event.get("discord_event_id"):
+            continue
+        description = _native_event_description(event)
+        fingerprint = hashlib.sha1(description.encode("utf-8")).hexdigest()
+        if native_description_fingerprints.get(event_id) != fingerprint:
+            pending[event_id] = (description, fingerprint)
+    if not pending:
+        return 0
+
+    # Native Events kommen über das Gateway in den Cache; nur fehlende werden einmalig gesammelt abgerufen
+    fetched = {}
+    if any(guild.get_scheduled_event(events[event_id]["discord_event_id"]) is None for event_id in pending):
         try:
-            yes_count = len(event["participants"]["yes"])
-            maybe_count = len(event["participants"]["maybe"])
-            no_count = len(event["participants"]["no"])
-            waiting_count = len(event["participants"]["waiting"])
-            participant_counts = f"✅ Zusagen: {yes_count}\n⚠️ Vielleicht: {maybe_count}\n❌ Absagen: {no_count}\n⏳ Warteliste: {waiting_count}"
-            base_event_description = f"{event['game']}\n\n{event['description']}"
-            message_link = event.get("message_link", "")
-            updated_event_description = f"{base_event_description}\n\n{participant_counts}\n\nEventdetails and Anmeldelink: {message_link}"
-
-            discord_event = await guild.fetch_scheduled_event(event["discord_event_id"])
-            await discord_event.edit(description=updated_event_description)
+            fetched = {e.id: e for e in await guild.fetch_scheduled_events(with_counts=False)}
         except Exception as e:
-            log.error(f"Fehler beim Aktualisieren des nativen Discord-Events in der Loop: {e}")
+            log.error(f"Fehler beim Abrufen der nativen Discord-Events: {e}")
 
-        # Bestehende Logik für Erinnerungen und Start...
+    async def _push(event_id: str, description: str, fingerprint: str) -> bool:
+        native_id = events[event_id]["discord_event_id"]
+        discord_event = guild.get_scheduled_event(native_id) or fetched.get(native_id)
+        if discord_event is None:
+            log.warning(f"Natives Discord-Event für Event {event_id} nicht gefunden.")
+            native_description_fingerprints[event_id] = fingerprint
+            return False
         try:
-            event_time = datetime.strptime(event["time"], "%d.%m.%Y %H:%M")
-            local_tz = datetime.now().astimezone().tzinfo
-            event_time = event_time.replace(tzinfo=local_tz)
-        except ValueError:
-            continue
+            pushed = False
+            if discord_event.description != description:
+                await sweep.call(f"scheduled_events:{guild.id}", lambda: discord_event.edit(description=description))
+                pushed = True
+            native_description_fingerprints[event_id] = fingerprint
+            return pushed
+        except Exception as e:
+            # Ein fehlerhaftes Event hält die übrigen nicht auf
+            log.error(f"Fehler beim Aktualisieren des nativen Discord-Events in der Loop: {e}")
+            metrics.inc("pepega_sweep_errors_total", task="native_sync")
+            return False
 
-        if now >= event_time - timedelta(hours=1) and not event.get("reminder_sent"):
-            channel = client.get_channel(event["channel_id"])
-            try:
-                message = await channel.fetch_message(event["message_id"])
-            except:
-                message = None
-            event_details_link = f"[Event Details]({message.jump_url})" if message else ''
-            embed = discord.Embed(
-                title="Event Erinnerung",
-                description=f"⏳ In einer Stunde startet **{event['title']}**!\n{event_details_link}",
-                color=discord.Color.blue()
-            )
-            await channel.send(embed=embed)
-            event["reminder_sent"] = True
+    results = await asyncio.gather(*(
+        _push(event_id, description, fingerprint)
+        for event_id, (description, fingerprint) in pending.items()
+    ))
+    return sum(results)
+
+
+async def refresh_event_message(event_id: str, event: dict):
+    embed = embed_renderer.render(event_id, event)
+    channel = client.get_channel(event["channel_id"])
+    if embed is None or channel is None or not event.get("message_id"):
+        return
+    try:
+        # Partielle Nachricht: Edit ohne vorheriges fetch_message
+        message = channel.get_partial_message(event["message_id"])
+        view = event_buttons(event_id)
+        await sweep.call(f"channel:{event['channel_id']}", lambda: message.edit(embed=embed, view=view))
+    except Exception as e:
+        log.error(f"Fehler beim Aktualisieren der Event-Nachricht {event_id}: {e}")
+        metrics.inc("pepega_sweep_errors_total", task="message_refresh")
+
+
+# --- Gebündelte Aktualisierung nach Änderungen ---
+NATIVE_SYNC_DELAY_SECONDS = 5.0
 
-        if now >= event_time:
-            channel = client.get_channel(event["channel_id"])
+
+class NativeSync:
+    """Sammelt geänderte Events und überträgt sie gebündelt, statt jede Minute alle Events abzufragen.
+
+    Die Beschreibung des nativen Events wird immer abgeglichen, die Event-Nachricht nur auf Wunsch
+    (bei Button-Klicks aktualisiert die Interaktion sie bereits selbst).
+    """
+
+    def __init__(self, delay: float = NATIVE_SYNC_DELAY_SECONDS):
+        self.delay = delay
+        self._pending: dict[tuple, bool] = {}  # (guild_id, event_id) -> Nachricht neu rendern
+        self._handle = None
+        self._task = None
+
+    def touch(self, guild_id: int, event_id: str, message: bool = False):
+        key = (guild_id, event_id)
+        self._pending[key] = self._pending.get(key, False) or message
+        if self._handle is None:
+            self._handle = asyncio.get_running_loop().call_later(self.delay, self._start_flush)
+
+    def _start_flush(self):
+        self._handle = None
+        self._task = asyncio.ensure_future(self.flush())
+
+    async def drain(self):
+        await self.flush()
+        if self._task is not None:
+            await self._task
+
+    async def flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        pending, self._pending = self._pending, {}
+        by_guild: dict[int, dict] = {}
+        for (guild_id, event_id), message in pending.items():
+            by_guild.setdefault(guild_id, {})[event_id] = message
+        results = await asyncio.gather(*(
+            self._flush_guild(guild_id, items) for guild_id, items in by_guild.items()
+        ))
+        metrics.inc("pepega_native_descriptions_pushed_total", sum(results))
+
+    async def _flush_guild(self, guild_id: int, items: dict) -> int:
+        guild = client.get_guild(guild_id)
+        events = load_data(guild_id)["events"]
+        changed = {event_id: events[event_id] for event_id in items if event_id in events}
+        if guild is None or not changed:
+            return 0
+        refreshes = [
+            refresh_event_message(event_id, event) for event_id, event in changed.items() if items[event_id]
+        ]
+        pushed, *_ = await asyncio.gather(sync_native_events(guild, changed), *refreshes)
+        return pushed
+
+
+native_sync = NativeSync()
+
+# Natives Discord-Event -> (guild_id, event_id), für die Gateway-Events
+native_event_index: dict[int, tuple] = {}
+
+
+def index_native_event(guild_id: int, event_id: str, event: dict):
+    if event.get("discord_event_id"):
+        native_event_index[event["discord_event_id"]] = (guild_id, event_id)
+
+
+def _forget_event(event: dict, event_id: str):
+    embed_renderer.forget(event_id)
+    participation_queue.forget(event_id)
+    native_description_fingerprints.pop(event_id, None)
+    native_event_index.pop(event.get("discord_event_id"), None)
+
+
+async def send_event_reminder(guild_id: int, event_id: str):
+    data = load_data(guild_id)
+    event = data["events"].get(event_id)
+    if not event or event.get("reminder_sent"):
+        return
+    channel = client.get_channel(event["channel_id"])
+    route = f"channel:{event['channel_id']}"
+    try:
+        message = await sweep.call(route, lambda: channel.fetch_message(event["message_id"]))
+    except:
+        message = None
+    event_details_link = f"[Event Details]({message.jump_url})" if message else ''
+    embed = discord.Embed(
+        title="Event Erinnerung",
+        description=f"⏳ In einer Stunde startet **{event['title']}**!\n{event_details_link}",
+        color=discord.Color.blue()
+    )
+    await sweep.call(route, lambda: channel.send(embed=embed))
+    event["reminder_sent"] = True
+    save_data(guild_id, event_id)
+
+
+async def _disable_buttons(event_id: str, event: dict):
+    channel = client.get_channel(event["channel_id"])
+    route = f"channel:{event['channel_id']}"
+    try:
+        msg = await sweep.call(route, lambda: channel.fetch_message(event["message_id"]))
+        await sweep.call(route, lambda: msg.edit(view=event_buttons(event_id, disabled=True)))
+    except discord.NotFound:
+        log.warning("Nachricht nicht gefunden, daher keine Buttons entfernt.")
+    except Exception as e:
+        log.error(f"Fehler beim Entfernen der Buttons: {e}")
+
+
+async def start_event(guild_id: int, event_id: str):
+    data = load_data(guild_id)
+    event = data["events"].get(event_id)
+    if not event:
+        return
+    channel = client.get_channel(event["channel_id"])
+    route = f"channel:{event['channel_id']}"
+
+    try:
+        announcements = [_disable_buttons(event_id, event)]
+        if channel is None:
+            log.warning(f"Channel {event['channel_id']} für Event {event_id} nicht gefunden, Start wird nicht angekündigt.")
+        else:
+            embed = embed_renderer.render_start(event_id, event)
+            announcements.append(sweep.call(route, lambda: channel.send(embed=embed)))
+        # Buttons deaktivieren und Start ankündigen laufen parallel
+        await asyncio.gather(*announcements)
+    finally:
+        # Die Ankündigung ist best effort – archiviert wird das Event in jedem Fall
+        if data["events"].pop(event_id, None) is not None:
+            store.archive_event(guild_id, event_id, event, "started")
+        _forget_event(event, event_id)
+
+
+async def cancel_event(guild_id: int, event_id: str):
+    # Natives Event wurde in Discord abgesagt oder gelöscht
+    data = load_data(guild_id)
+    event = data["events"].pop(event_id, None)
+    if not event:
+        return
+    scheduler.cancel(event_id)
+    _forget_event(event, event_id)
+    store.archive_event(guild_id, event_id, event, "cancelled")
+    channel = client.get_channel(event["channel_id"])
+    notice = f"🚫 **{event['title']}** wurde abgesagt."
+    await asyncio.gather(
+        _disable_buttons(event_id, event),
+        sweep.call(f"channel:{event['channel_id']}", lambda: channel.send(notice)),
+        return_exceptions=True
+    )
+
+
+# --- Scheduler: Erinnerungen und Start genau zur Frist ---
+REMINDER_LEAD_TIME = timedelta(hours=1)
+# Obergrenze für eine einzelne Schlafphase, damit Uhrumstellungen/Standby nicht zu verspäteten Fristen führen
+MAX_SCHEDULER_SLEEP_SECONDS = 3600
+
+
+class EventScheduler:
+    """Min-Heap mit der jeweils nächsten Frist (Erinnerung, Start) pro Event."""
+
+    def __init__(self):
+        self._heap = []  # (Zeitstempel, Reihenfolge, guild_id, event_id, Art, Version)
+        self._versions: dict[str, int] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running: set[asyncio.Task] = set()
+        self._handlers = {"reminder": send_event_reminder, "start": start_event}
+
+    def schedule(self, guild_id: int, event_id: str, event: dict):
+        start_ts = event.get("start_ts")
+        if start_ts is None:
+            log.error(f"Ungültige Startzeit für Event {event_id}, wird nicht eingeplant.")
+            return
+
+        # Neue Version macht alte Heap-Einträge dieses Events ungültig
+        version = self._versions.get(event_id, 0) + 1
+        self._versions[event_id] = version
+        if not event.get("reminder_sent"):
+            self._push(start_ts - REMINDER_LEAD_TIME.total_seconds(), guild_id, event_id, "reminder", version)
+        self._push(start_ts, guild_id, event_id, "start", version)
+        self._wakeup.set()
+
+    def cancel(self, event_id: str):
+        # Einträge werden beim Erreichen der Heap-Spitze verworfen
+        self._versions.pop(event_id, None)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _push(self, deadline: float, guild_id: int, event_id: str, kind: str, version: int):
+        heapq.heappush(self._heap, (deadline, next(self._counter), guild_id, event_id, kind, version))
+
+    def _is_current(self, entry) -> bool:
+        return self._versions.get(entry[3]) == entry[5]
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            while self._heap and not self._is_current(self._heap[0]):
+                heapq.heappop(self._heap)
+
+            now = time.time()
+            if not self._heap or self._heap[0][0] > now:
+                timeout = MAX_SCHEDULER_SLEEP_SECONDS
+                if self._heap:
+                    timeout = min(timeout, self._heap[0][0] - now)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Alle fälligen Fristen auf einmal abholen; pro Event in Reihenfolge, Events untereinander parallel
+            due: dict[tuple, list] = {}
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if self._is_current(entry):
+                    due.setdefault((entry[2], entry[3]), []).append(entry[4])
+            for (_, event_id), kinds in due.items():
+                if "start" in kinds:
+                    self.cancel(event_id)
+            # Als eigene Tasks starten, damit ein langsamer Start spätere Fristen nicht aufhält
+            for (guild_id, event_id), kinds in due.items():
+                task = asyncio.create_task(self._run_due(guild_id, event_id, kinds))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _run_due(self, guild_id: int, event_id: str, kinds: list):
+        for kind in kinds:
             try:
-                msg = await channel.fetch_message(event["message_id"])
-                disabled_view = EventButtons(event_id)
-                for child in disabled_view.children:
-                    child.disabled = True
-                await msg.edit(view=disabled_view)
-            except discord.NotFound:
-                log.warning("Nachricht nicht gefunden, daher keine Buttons entfernt.")
+                with metrics.timer("pepega_deadline_seconds", kind=kind):
+                    await self._handlers[kind](guild_id, event_id)
             except Exception as e:
-                log.error(f"Fehler beim Entfernen der Buttons: {e}")
-
-            # Erstelle ein Embed für den Event-Start inklusive der Warteliste (Kategorie "waiting")
-            yes_mentions = ', '.join([f'<@{uid}>' for uid in event["participants"]["yes"]]) or "Keine"
-            waiting_mentions = ', '.join([f'<@{uid}>' for uid in event["participants"]["waiting"]]) or "Keine"
-            no_mentions = ', '.join([f'<@{uid}>' for uid in event["participants"]["no"]]) or "Keine"
-            embed = discord.Embed(
-                title="Event Start",
-                description=f"🎮 **{event['title']}** startet jetzt!",
-                color=discord.Color.green()
-            )
-            embed.add_field(name="✅ Zusagen", value=yes_mentions, inline=True)
-            embed.add_field(name="⏳ Warteliste", value=waiting_mentions, inline=True)
-            await channel.send(embed=embed)
-            del data["events"][event_id]
-    save_data(data)
+                log.error(f"Fehler bei Frist '{kind}' für Event {event_id}: {e}")
+                metrics.inc("pepega_sweep_errors_total", task=kind)
+
+
+scheduler = EventScheduler()
+
+
+_check_events_lock = asyncio.Lock()
+
+
+# Änderungen laufen über Gateway-Events und NativeSync; der Durchlauf ist nur noch ein Abgleich,
+# falls ein Push fehlgeschlagen ist oder jemand die Beschreibung von Hand geändert hat
+RECONCILE_INTERVAL_MINUTES = 15
+
+
+@tasks.loop(minutes=RECONCILE_INTERVAL_MINUTES)
+async def check_events():
+    # Ein Durchlauf darf nie den vorherigen überlappen (z.B. bei manuellem Auslösen)
+    if _check_events_lock.locked():
+        log.warning("Vorheriger check_events-Durchlauf läuft noch – dieser Tick wird übersprungen.")
+        metrics.inc("pepega_check_events_skipped_total")
+        return
+    async with _check_events_lock:
+        with metrics.timer("pepega_check_events_tick_seconds"):
+            # Nur Guilds, die auf den Shards dieser Instanz laufen – alle anderen sieht get_guild nicht
+            shards: dict[int, list] = {}
+            for guild_id in store.guild_ids():
+                guild = client.get_guild(guild_id)
+                if guild is not None:
+                    shards.setdefault(guild.shard_id, []).append(guild)
+            results = await asyncio.gather(*(_sweep_shard(shard_id, guilds) for shard_id, guilds in shards.items()))
+    metrics.inc("pepega_native_descriptions_pushed_total", sum(results))
+
+
+async def _sweep_shard(shard_id: int, guilds: list) -> int:
+    with metrics.timer("pepega_check_events_shard_seconds", shard=shard_id):
+        # Neue Serientermine nachlegen, sobald sie ins Fenster rutschen
+        extended = await asyncio.gather(*(extend_series(guild) for guild in guilds), return_exceptions=True)
+        _log_sweep_errors("series", guilds, extended)
+        reconciled = await asyncio.gather(*(
+            reconcile_native_rsvps(guild, load_data(guild.id)["events"]) for guild in guilds
+        ), return_exceptions=True)
+        _log_sweep_errors("native_rsvps", guilds, reconciled)
+        pushed = await asyncio.gather(*(
+            sync_native_events(guild, load_data(guild.id)["events"]) for guild in guilds
+        ), return_exceptions=True)
+        _log_sweep_errors("native_sync", guilds, pushed)
+    metrics.set("pepega_check_events_guilds", len(guilds), shard=shard_id)
+    metrics.set("pepega_check_events_events", sum(len(load_data(guild.id)["events"]) for guild in guilds), shard=shard_id)
+    return sum(result for result in pushed if not isinstance(result, BaseException))
+
+
+def _log_sweep_errors(task: str, guilds: list, results: list):
+    """Protokolliert fehlgeschlagene Guilds, ohne die ``tasks.loop`` abzubrechen."""
+    for guild, result in zip(guilds, results):
+        if isinstance(result, Exception):
+            log.error(f"Fehler beim Durchlauf '{task}' für Guild {guild.id}: {result}")
+            metrics.inc("pepega_sweep_errors_total", task=task)
+        elif isinstance(result, BaseException):
+            raise result
+
+
+def schedule_guild_events(guild_id: int):
+    data = load_data(guild_id)
+    for event_id, event in data["events"].items():
+        scheduler.schedule(guild_id, event_id, event)
+        index_native_event(guild_id, event_id, event)
 
 @client.event
 async def on_ready():
-    log.info(f'✅ Eingeloggt als {client.user}!')
+    log.info(f'✅ Eingeloggt als {client.user} mit {client.shard_count} Shard(s), {len(client.guilds)} Guilds!')
     try:
-        guild = discord.Object(id=GUILD_ID)
-        synced = await client.tree.sync(guild=guild)
-        log.info(f'🔄 Synced {len(synced)} Commands mit Guild {guild.id}')
+        if GUILD_ID:
+            # Entwicklungsmodus: Befehle sofort auf einer einzelnen Guild verfügbar
+            guild = discord.Object(id=GUILD_ID)
+            synced = await client.tree.sync(guild=guild)
+            log.info(f'🔄 Synced {len(synced)} Commands mit Guild {guild.id}')
+        else:
+            synced = await client.tree.sync()
+            log.info(f'🔄 Synced {len(synced)} Commands global')
     except Exception as e:
         log.error(f'❌ Fehler beim Sync: {e}')
-    # Registriere persistent Views für alle aktiven Events
-    data = load_data()
-    for event_id in data["events"]:
-        client.add_view(EventButtons(event_id))
-    check_events.start()
+    # Die Buttons aller Events laufen über den dynamischen ParticipationButton-Handler
+    for guild_id in store.guild_ids():
+        if client.get_guild(guild_id) is not None:
+            schedule_guild_events(guild_id)
+    scheduler.start()
+    if not check_events.is_running():
+        check_events.start()
+
+@client.event
+async def on_guild_join(guild: discord.Guild):
+    log.info(f'➕ Guild {guild.name} ({guild.id}) auf Shard {guild.shard_id} beigetreten.')
+    # Bei erneutem Beitritt liegen eventuell noch Events in der Partition
+    schedule_guild_events(guild.id)
+
+# --- Gateway: native Discord-Events ---
+
+async def _apply_native_rsvp(scheduled_event: discord.ScheduledEvent, user: discord.abc.User, choice: str):
+    entry = native_event_index.get(scheduled_event.id)
+    if entry is None or user.bot:
+        return
+    guild_id, event_id = entry
+    await _apply_native_choice(guild_id, event_id, user.id, choice)
+
+
+async def _apply_native_choice(guild_id: int, event_id: str, user_id: int, choice: str):
+    data = load_data(guild_id)
+    if event_id not in data["events"]:
+        return
+    async with participation_queue.lock(event_id):
+        event = data["events"].get(event_id)
+        if not event:
+            return
+        # Wer auf dem nativen Event "Interessiert" ist, merkt sich das Event für den Abgleich in check_events
+        interested = set(event.get("native_interested", ()))
+        if choice == "yes":
+            interested.add(user_id)
+        else:
+            interested.discard(user_id)
+        event["native_interested"] = sorted(interested)
+        state = event["participants"].state_of(user_id)
+        # "Interessiert" entspricht einer Zusage; wer es zurücknimmt, sagt ab
+        if (choice == "yes" and state in ("yes", "waiting")) or (choice == "no" and state not in ("yes", "waiting")):
+            save_data(guild_id, event_id)
+            return
+        _, promoted = event["participants"].set_choice(user_id, choice, event["max_players"])
+        _track_late_cancellation(event, user_id, state)
+        promoted = [uid for uid in promoted if event["participants"].state_of(uid) == "yes"]
+        save_data(guild_id, event_id)
+    metrics.inc("pepega_native_rsvps_total", choice=choice)
+    native_sync.touch(guild_id, event_id, message=True)
+    if promoted:
+        channel = client.get_channel(event["channel_id"])
+        mentions = ', '.join(f'<@{uid}>' for uid in promoted)
+        await sweep.call(f"channel:{event['channel_id']}", lambda: channel.send(
+            f"🎉 {mentions} – du bist von der Warteliste nachgerückt und nimmst an **{event['title']}** teil!"
+        ))
+
+async def reconcile_native_rsvps(guild: discord.Guild, events: dict) -> int:
+    """Übernimmt RSVPs, die das Gateway für Nutzer außerhalb des Caches nicht gemeldet hat."""
+    async def _interested_users(discord_event: discord.ScheduledEvent) -> set:
+        return {user.id async for user in discord_event.users() if not user.bot}
+
+    async def _reconcile(event_id: str, event: dict) -> int:
+        discord_event = guild.get_scheduled_event(event["discord_event_id"])
+        if discord_event is None:
+            return 0
+        try:
+            interested = await sweep.call(f"scheduled_events:{guild.id}", lambda: _interested_users(discord_event))
+        except Exception as e:
+            log.error(f"Fehler beim Abrufen der Interessenten für Event {event_id}: {e}")
+            metrics.inc("pepega_sweep_errors_total", task="native_rsvps")
+            return 0
+        known = set(event.get("native_interested", ()))
+        changes = [(uid, "yes") for uid in interested - known] + [(uid, "no") for uid in known - interested]
+        for user_id, choice in changes:
+            await _apply_native_choice(guild.id, event_id, user_id, choice)
+        return len(changes)
+
+    results = await asyncio.gather(*(
+        _reconcile(event_id, event) for event_id, event in list(events.items()) if event.get("discord_event_id")
+    ))
+    return sum(results)
+
+@client.event
+async def on_scheduled_event_user_add(scheduled_event: discord.ScheduledEvent, user: discord.abc.User):
+    await _apply_native_rsvp(scheduled_event, user, "yes")
+
+@client.event
+async def on_scheduled_event_user_remove(scheduled_event: discord.ScheduledEvent, user: discord.abc.User):
+    await _apply_native_rsvp(scheduled_event, user, "no")
+
+@client.event
+async def on_scheduled_event_update(before: discord.ScheduledEvent, after: discord.ScheduledEvent):
+    entry = native_event_index.get(after.id)
+    if entry is None:
+        return
+    guild_id, event_id = entry
+    if after.status is discord.EventStatus.cancelled:
+        await cancel_event(guild_id, event_id)
+        return
+    # Eigene Beschreibungs-Updates lösen ebenfalls dieses Event aus – nur Titel und Zeiten übernehmen
+    if before.name == after.name and before.start_time == after.start_time and before.end_time == after.end_time:
+        return
+    data = load_data(guild_id)
+    event = data["events"].get(event_id)
+    if not event:
+        return
+    event["title"] = after.name
+    start_ts = int(after.start_time.timestamp())
+    if start_ts != event["start_ts"]:
+        # Gespeicherte Dauer beibehalten: das Ende wandert mit dem Start mit
+        if event.get("end_ts") is not None:
+            event["end_ts"] += start_ts - event["start_ts"]
+        event["start_ts"] = start_ts
+        event.pop("reminder_sent", None)
+        scheduler.schedule(guild_id, event_id, event)
+    # Ein explizit geändertes Ende aus Discord hat Vorrang
+    if "end_ts" in event and after.end_time is not None and before.end_time != after.end_time:
+        event["end_ts"] = int(after.end_time.timestamp())
+    save_data(guild_id, event_id)
+    log.info(f"Event {event_id} wurde in Discord bearbeitet und übernommen.")
+    native_sync.touch(guild_id, event_id, message=True)
+
+@client.event
+async def on_scheduled_event_delete(scheduled_event: discord.ScheduledEvent):
+    entry = native_event_index.get(scheduled_event.id)
+    if entry is not None:
+        await cancel_event(*entry)
 
-client.run(TOKEN)
+if __name__ == "__main__":
+    client.run(TOKEN)
@@ -0,0 +1,197 @@
+import re
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+
+from aiohttp import web
+
+log = logging.getLogger('BOT-METRICS')
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Snowflakes in URLs zusammenfassen, damit pro Endpunkt und nicht pro Objekt gezählt wird
+_SNOWFLAKE = re.compile(r"/\d{15,21}")
+_API_PREFIX = re.compile(r"^https?://[^/]+/api/v\d+")
+# Interaktions- und Webhook-URLs enthalten ein Token, das nicht im Label landen darf
+_TOKEN = re.compile(r"(/(?:interactions|webhooks)/\{id\})/[^/]+")
+
+
+def endpoint_label(method: str, url: str) -> str:
+    path = _SNOWFLAKE.sub("/{id}", _API_PREFIX.sub("", str(url)).split("?", 1)[0])
+    path = _TOKEN.sub(r"\1/{token}", path)
+    return f"{method} {path}"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+
+class Metrics:
+    """Zähler, Gauges und Histogramme im Speicher, ausgebbar im Prometheus-Textformat."""
+
+    def __init__(self):
+        self._counters: dict[tuple, float] = defaultdict(float)
+        self._gauges: dict[tuple, float] = {}
+        self._histograms: dict[tuple, Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        self._counters[self._key(name, labels)] += value
+
+    def set(self, name: str, value: float, **labels):
+        self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @staticmethod
+    def _format_labels(labels, extra: tuple = ()) -> str:
+        pairs = [*labels, *extra]
+        if not pairs:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+        return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+    def render_prometheus(self) -> str:
+        lines = []
+        typed = set()
+
+        def _type(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self._counters.items()):
+            _type(name, "counter")
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+        for (name, labels), value in sorted(self._gauges.items()):
+            _type(name, "gauge")
+            lines.append(f"{name}{self._format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+            _type(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{self._format_labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{self._format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> list:
+        """Kurzübersicht für den Admin-Befehl: eine Zeile pro Messreihe."""
+        lines = []
+        for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+            if histogram.count:
+                avg_ms = histogram.sum / histogram.count * 1000
+                lines.append(
+                    f"{name}{self._format_labels(labels)}: n={histogram.count} "
+                    f"avg={avg_ms:.1f}ms max={histogram.max * 1000:.1f}ms"
+                )
+        for (name, labels), value in sorted(self._gauges.items()):
+            lines.append(f"{name}{self._format_labels(labels)}: {value:g}")
+        for (name, labels), value in sorted(self._counters.items()):
+            lines.append(f"{name}{self._format_labels(labels)}: {value:g}")
+        return lines
+
+
+metrics = Metrics()
+
+
+def instrument_http_client(http):
+    """Zählt und misst jeden REST-Aufruf, den discord.py über ``http.request`` absetzt."""
+    _instrument_request(http)
+
+
+def instrument_webhook_adapter(adapter):
+    """Wie ``instrument_http_client`` für Interaktionsantworten und Followups.
+
+    discord.py schickt diese nicht über ``http.request``, sondern über den Webhook-Adapter.
+    """
+    _instrument_request(adapter)
+
+
+def _instrument_request(target):
+    original_request = target.request
+
+    async def request(route, *args, **kwargs):
+        endpoint = endpoint_label(route.method, route.url)
+        metrics.inc("pepega_discord_requests_total", endpoint=endpoint)
+        started = time.perf_counter()
+        try:
+            return await original_request(route, *args, **kwargs)
+        except Exception as e:
+            metrics.inc("pepega_discord_request_errors_total", endpoint=endpoint, status=getattr(e, "status", "error"))
+            raise
+        finally:
+            metrics.observe("pepega_discord_request_seconds", time.perf_counter() - started, endpoint=endpoint)
+
+    target.request = request
+
+
+class RateLimitLogHandler(logging.Handler):
+    """discord.py behandelt 429er intern und meldet sie nur im Log – von dort werden sie gezählt.
+
+    Globale Limits meldet discord.py zusätzlich zur Routen-Zeile; sie werden nur einmal gezählt.
+    """
+
+    def emit(self, record: logging.LogRecord):
+        message = str(record.msg)
+        if "responded with 429" in message and len(record.args) >= 3:
+            method, url, retry_after = record.args[:3]
+            endpoint = endpoint_label(method, url)
+        elif message.startswith("Webhook ID") and "is rate limited" in message and len(record.args) >= 2:
+            endpoint, retry_after = "webhook", record.args[-1]
+        else:
+            return
+        metrics.inc("pepega_discord_ratelimited_total", endpoint=endpoint)
+        metrics.inc("pepega_discord_retry_after_seconds_total", float(retry_after), endpoint=endpoint)
+
+
+async def start_http_server(host: str, port: int):
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        # Z.B. belegter Port durch einen zweiten Prozess – der Bot läuft ohne Metrik-Endpunkt weiter
+        log.error(f"Metrik-Endpunkt auf {host}:{port} konnte nicht gestartet werden: {e}")
+        await runner.cleanup()
+        return None
+    log.info(f"📈 Metriken unter http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,667 @@
+import os
+import json
+import asyncio
+import logging
+import sqlite3
+import argparse
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from metrics import metrics
+
+log = logging.getLogger('BOT-STORAGE')
+
+FLUSH_DELAY_SECONDS = 2.0
+DEFAULT_TIMEZONE = "Europe/Berlin"
+LEGACY_TIME_FORMAT = "%d.%m.%Y %H:%M"
+
+
+# Teile einer Guild-Partition, die nicht zu den Einstellungen gehören und eigens gespeichert werden
+PARTITION_KEYS = ("events", "stats")
+
+
+def _default_guild():
+    return {"events": {}, "admins": [], "moderators": [], "event_channel_id": None}
+
+
+def _default_data():
+    return {"guilds": {}}
+
+
+class Participants:
+    """Teilnehmer eines Events mit Rückwärtsindex User -> Status.
+
+    Jede Kategorie ist eine einfügegeordnete Menge, die Warteliste ist FIFO. Alle Übergänge sind O(1).
+    Serialisiert wird in die bisherige JSON-Form ``{"yes": [...], "maybe": [...], "no": [...], "waiting": [...]}``.
+    """
+
+    CATEGORIES = ("yes", "maybe", "no", "waiting")
+
+    def __init__(self):
+        self._state: dict[int, str] = {}
+        self._members: dict[str, OrderedDict] = {category: OrderedDict() for category in self.CATEGORIES}
+        # Steigt bei jeder Änderung – Caches (z.B. gerenderte Embeds) erkennen daran veraltete Einträge
+        self.version = 0
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "Participants":
+        participants = cls()
+        for category in cls.CATEGORIES:
+            for user_id in raw.get(category, []):
+                # Alte Dateien können User doppelt enthalten – der erste Eintrag gewinnt
+                if user_id not in participants._state:
+                    participants._add(user_id, category)
+        return participants
+
+    def to_dict(self) -> dict:
+        return {category: list(members) for category, members in self._members.items()}
+
+    def __getitem__(self, category: str):
+        # Nur lesende Sicht: unterstützt len(), in und Iteration in Einfügereihenfolge
+        return self._members[category].keys()
+
+    def state_of(self, user_id: int):
+        return self._state.get(user_id)
+
+    def _add(self, user_id: int, category: str):
+        self._state[user_id] = category
+        self._members[category][user_id] = None
+        self.version += 1
+
+    def _remove(self, user_id: int):
+        category = self._state.pop(user_id, None)
+        if category is not None:
+            del self._members[category][user_id]
+            self.version += 1
+        return category
+
+    def set_choice(self, user_id: int, choice: str, max_players: int):
+        """Setzt die Wahl eines Users. Gibt den neuen Status und die nachgerückten User zurück."""
+        previous = self._state.get(user_id)
+        if previous == choice or (choice == "yes" and previous == "waiting"):
+            # Keine Änderung – insbesondere behält man seinen Platz auf der Warteliste
+            return previous, []
+
+        self._remove(user_id)
+        if choice == "yes" and len(self._members["yes"]) >= max_players:
+            self._add(user_id, "waiting")
+        else:
+            self._add(user_id, choice)
+
+        promoted = self.promote(max_players) if previous == "yes" else []
+        return self._state[user_id], promoted
+
+    def promote(self, max_players: int) -> list:
+        """Lässt Wartende nachrücken, solange Zusagen frei sind."""
+        promoted = []
+        waiting = self._members["waiting"]
+        while waiting and len(self._members["yes"]) < max_players:
+            user_id, _ = waiting.popitem(last=False)
+            self._add(user_id, "yes")
+            promoted.append(user_id)
+        return promoted
+
+
+def _legacy_timestamp(value: str, timezone_name: str):
+    # Alte Events speichern die Wanduhrzeit als Text – sie wird in der Event-Zeitzone gelesen
+    try:
+        event_time = datetime.strptime(value, LEGACY_TIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    return int(event_time.replace(tzinfo=ZoneInfo(timezone_name)).timestamp())
+
+
+def _event_start_timestamp(event: dict):
+    if "start_ts" in event:
+        return event["start_ts"]
+    return _legacy_timestamp(event.get("time"), event.get("timezone", DEFAULT_TIMEZONE))
+
+
+def _migrate_event_times(event: dict, timezone_name: str) -> bool:
+    """Ersetzt die Textfelder ``time``/``end_time`` durch Epoch-Sekunden und eine Zeitzone."""
+    if "start_ts" in event:
+        return False
+    event["start_ts"] = _legacy_timestamp(event.pop("time", None), timezone_name)
+    if "end_time" in event:
+        end_ts = _legacy_timestamp(event.pop("end_time"), timezone_name)
+        if end_ts is not None:
+            event["end_ts"] = end_ts
+    event["timezone"] = timezone_name
+    return True
+
+
+def _event_guild_id(event: dict):
+    if event.get("guild_id"):
+        return event["guild_id"]
+    # Ältere Events kennen ihre Guild nur über den Nachrichtenlink
+    parts = event.get("message_link", "").split("/")
+    if len(parts) >= 7 and parts[-3].isdigit():
+        return int(parts[-3])
+    return None
+
+
+def _migrate_legacy(data: dict, legacy_guild_id):
+    """Überführt alte Dateien ohne Guild-Partitionen in das Format ``{"guilds": {guild_id: {...}}}``."""
+    if "guilds" in data:
+        return data
+    guilds = {}
+    unassigned = []
+    for event_id, event in data.get("events", {}).items():
+        guild_id = _event_guild_id(event) or legacy_guild_id
+        if guild_id is None:
+            unassigned.append(event_id)
+            continue
+        event["guild_id"] = guild_id
+        guilds.setdefault(str(guild_id), _default_guild())["events"][event_id] = event
+
+    # Rechte und Event-Channel gehören zur bisher einzigen Guild
+    settings = {key: value for key, value in data.items() if key != "events"}
+    if legacy_guild_id is None and len(guilds) == 1:
+        legacy_guild_id = next(iter(guilds))
+    # Nicht zuordenbare Daten würden beim nächsten Schreiben endgültig verloren gehen – lieber nicht migrieren
+    if unassigned or (legacy_guild_id is None and any(settings.values())):
+        raise ValueError(
+            f"{len(unassigned)} alte Events bzw. die globalen Einstellungen lassen sich keiner Guild zuordnen – "
+            "bitte GUILD_ID für den ersten Start setzen."
+        )
+    if legacy_guild_id is not None:
+        guilds.setdefault(str(legacy_guild_id), _default_guild()).update(settings)
+    return {"guilds": guilds}
+
+
+def _plain_event(event: dict) -> dict:
+    # Unabhängige Kopie, die im Storage-Thread serialisiert werden kann, während der Bot weiterläuft
+    plain = copy.deepcopy({key: value for key, value in event.items() if key != "participants"})
+    plain["participants"] = event["participants"].to_dict()
+    return plain
+
+
+def _plain_settings(guild: dict) -> dict:
+    return copy.deepcopy({key: value for key, value in guild.items() if key not in PARTITION_KEYS})
+
+
+def _archive_path(json_path: str) -> str:
+    return f"{os.path.splitext(json_path)[0]}_archive.jsonl"
+
+
+# --- Backends ---
+# Backends arbeiten ausschließlich mit einfachen JSON-Strukturen und laufen nur im Storage-Thread.
+# Änderungen kommen als {"events": {(guild_id, event_id): Event | None}, "settings": {guild_id: Einstellungen},
+#  "archive": [(guild_id, event_id, Archiveintrag)], "stats": {(guild_id, Bereich, Schlüssel): Zähler}}.
+# Das Archiv wird nur angehängt und nie geladen; die Statistik-Zähler gehören zur Guild-Partition.
+
+class JsonBackend:
+    """Der komplette Datenstand in einer JSON-Datei, partitioniert nach Guild; das Archiv als JSON Lines daneben."""
+
+    def __init__(self, path: str, legacy_guild_id: int | None = None):
+        self.path = path
+        self.archive_path = _archive_path(path)
+        self.legacy_guild_id = legacy_guild_id
+        self._data = _default_data()
+
+    def load(self) -> dict:
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self._data = _migrate_legacy(json.load(f), self.legacy_guild_id)
+        return copy.deepcopy(self._data)
+
+    def _guild(self, guild_id: str) -> dict:
+        return self._data["guilds"].setdefault(guild_id, _default_guild())
+
+    def write(self, changes: dict):
+        # Archiv zuerst: bricht der Vorgang danach ab, steht ein Event höchstens doppelt im Archiv, fehlt aber nie
+        written = self._append_archive(changes.get("archive", ()))
+
+        # JSON kennt keine Einzelzeilen – der Spiegel wird aktualisiert und die ganze Datei atomar ersetzt
+        for (guild_id, event_id), event in changes["events"].items():
+            if event is None:
+                self._guild(guild_id)["events"].pop(event_id, None)
+            else:
+                self._guild(guild_id)["events"][event_id] = event
+        for guild_id, settings in changes["settings"].items():
+            guild = self._guild(guild_id)
+            self._data["guilds"][guild_id] = {**settings, **{key: guild[key] for key in PARTITION_KEYS if key in guild}}
+        for (guild_id, scope, key), counters in changes.get("stats", {}).items():
+            self._guild(guild_id).setdefault("stats", {}).setdefault(scope, {})[key] = counters
+
+        encoded = json.dumps(self._data, indent=4).encode("utf-8")
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return written + len(encoded)
+
+    def _append_archive(self, records) -> int:
+        if not records:
+            return 0
+        encoded = "".join(
+            json.dumps({"guild_id": guild_id, "event_id": event_id, **record}) + "\n"
+            for guild_id, event_id, record in records
+        ).encode("utf-8")
+        with open(self.archive_path, "ab") as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(encoded)
+
+    def event_ids_for_user(self, user_id: int, guild_id: str) -> list:
+        return [
+            event_id for event_id, event in self._guild(guild_id)["events"].items()
+            if any(user_id in user_ids for user_ids in event["participants"].values())
+        ]
+
+    def close(self):
+        pass
+
+
+class SqliteBackend:
+    """SQLite im WAL-Modus: eine Zeile pro Event, Teilnahme, Berechtigung und Einstellung, jeweils je Guild."""
+
+    SCHEMA_VERSION = 3
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            event_id TEXT PRIMARY KEY,
+            guild_id INTEGER,
+            start_ts INTEGER,
+            payload TEXT NOT NULL
+        );
+        -- Ohne Abfragen nach Startzeit kostet dieser Index nur Schreibzeit
+        DROP INDEX IF EXISTS idx_events_start;
+        CREATE INDEX IF NOT EXISTS idx_events_guild ON events (guild_id, start_ts);
+
+        CREATE TABLE IF NOT EXISTS participations (
+            event_id TEXT NOT NULL REFERENCES events (event_id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (event_id, user_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_participations_user ON participations (user_id);
+
+        CREATE TABLE IF NOT EXISTS permissions (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, user_id, role)
+        );
+
+        CREATE TABLE IF NOT EXISTS settings (
+            guild_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (guild_id, key)
+        );
+
+        CREATE TABLE IF NOT EXISTS archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            event_id TEXT NOT NULL,
+            start_ts INTEGER,
+            outcome TEXT NOT NULL,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_archive_guild ON archive (guild_id, start_ts);
+
+        CREATE TABLE IF NOT EXISTS stats (
+            guild_id INTEGER NOT NULL,
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            counters TEXT NOT NULL,
+            PRIMARY KEY (guild_id, scope, key)
+        );
+    """
+
+    def __init__(self, path: str, legacy_guild_id: int | None = None):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 1:
+            self._migrate_v1(legacy_guild_id)
+        else:
+            self.conn.executescript(self.SCHEMA)
+        self.conn.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+
+    def _migrate_v1(self, legacy_guild_id):
+        # Version 1 kannte nur eine Guild: Rechte und Einstellungen wandern in deren Partition
+        if legacy_guild_id is None:
+            guild_ids = self.conn.execute("SELECT DISTINCT guild_id FROM events WHERE guild_id IS NOT NULL").fetchall()
+            legacy_guild_id = guild_ids[0][0] if len(guild_ids) == 1 else 0
+            if legacy_guild_id == 0:
+                log.warning("GUILD_ID fehlt – alte Rechte und Einstellungen liegen unter Guild 0.")
+        with self.conn:
+            self.conn.execute("ALTER TABLE permissions RENAME TO permissions_v1")
+            self.conn.execute("ALTER TABLE settings RENAME TO settings_v1")
+        self.conn.executescript(self.SCHEMA)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO permissions (guild_id, user_id, role, position) "
+                "SELECT ?, user_id, role, position FROM permissions_v1", (legacy_guild_id,)
+            )
+            self.conn.execute(
+                "INSERT INTO settings (guild_id, key, value) SELECT ?, key, value FROM settings_v1", (legacy_guild_id,)
+            )
+            self.conn.execute("UPDATE events SET guild_id = ? WHERE guild_id IS NULL", (legacy_guild_id,))
+            self.conn.execute("DROP TABLE permissions_v1")
+            self.conn.execute("DROP TABLE settings_v1")
+
+    def is_empty(self) -> bool:
+        row = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM events) + (SELECT COUNT(*) FROM permissions) + (SELECT COUNT(*) FROM settings)"
+        ).fetchone()
+        return row[0] == 0
+
+    def load(self) -> dict:
+        data = _default_data()
+
+        def _guild(guild_id) -> dict:
+            return data["guilds"].setdefault(str(guild_id), _default_guild())
+
+        for guild_id, key, value in self.conn.execute("SELECT guild_id, key, value FROM settings"):
+            _guild(guild_id)[key] = json.loads(value)
+        # Nur die Zähler – das Archiv selbst bleibt in der Datenbank
+        for guild_id, scope, key, counters in self.conn.execute("SELECT guild_id, scope, key, counters FROM stats"):
+            _guild(guild_id).setdefault("stats", {}).setdefault(scope, {})[key] = json.loads(counters)
+        for guild_id, user_id, role in self.conn.execute(
+            "SELECT guild_id, user_id, role FROM permissions ORDER BY guild_id, position"
+        ):
+            _guild(guild_id)["admins" if role == "admin" else "moderators"].append(user_id)
+
+        raw_participants = {}
+        for event_id, user_id, state in self.conn.execute(
+            "SELECT event_id, user_id, state FROM participations ORDER BY event_id, position"
+        ):
+            raw_participants.setdefault(event_id, {}).setdefault(state, []).append(user_id)
+        for event_id, guild_id, payload in self.conn.execute("SELECT event_id, guild_id, payload FROM events"):
+            event = json.loads(payload)
+            event["participants"] = raw_participants.get(event_id, {})
+            _guild(guild_id)["events"][event_id] = event
+        return data
+
+    def write(self, changes: dict):
+        written = 0
+        with self.conn:
+            for (guild_id, event_id), event in changes["events"].items():
+                if event is None:
+                    self.conn.execute("DELETE FROM events WHERE event_id = ?", (event_id,))
+                else:
+                    written += self._write_event(int(guild_id), event_id, event)
+            for guild_id, settings in changes["settings"].items():
+                written += self._write_settings(int(guild_id), settings)
+            for guild_id, event_id, record in changes.get("archive", ()):
+                payload = json.dumps(record)
+                self.conn.execute(
+                    "INSERT INTO archive (guild_id, event_id, start_ts, outcome, payload) VALUES (?, ?, ?, ?, ?)",
+                    (int(guild_id), event_id, _event_start_timestamp(record), record["outcome"], payload)
+                )
+                written += len(payload)
+            stats_rows = [
+                (int(guild_id), scope, key, json.dumps(counters))
+                for (guild_id, scope, key), counters in changes.get("stats", {}).items()
+            ]
+            self.conn.executemany(
+                "INSERT INTO stats (guild_id, scope, key, counters) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (guild_id, scope, key) DO UPDATE SET counters = excluded.counters",
+                stats_rows
+            )
+            written += sum(len(row[3]) for row in stats_rows)
+        # Ungefähre Nutzdatenmenge – die tatsächlichen Seiten schreibt SQLite selbst
+        return written
+
+    def _write_event(self, guild_id: int, event_id: str, event: dict):
+        payload = json.dumps({key: value for key, value in event.items() if key != "participants"})
+        self.conn.execute(
+            "INSERT INTO events (event_id, guild_id, start_ts, payload) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (event_id) DO UPDATE SET guild_id = excluded.guild_id, "
+            "start_ts = excluded.start_ts, payload = excluded.payload",
+            (event_id, guild_id, _event_start_timestamp(event), payload)
+        )
+        self.conn.execute("DELETE FROM participations WHERE event_id = ?", (event_id,))
+        rows = [
+            (event_id, user_id, state, position)
+            for state, user_ids in event["participants"].items()
+            for position, user_id in enumerate(user_ids)
+        ]
+        self.conn.executemany(
+            "INSERT INTO participations (event_id, user_id, state, position) VALUES (?, ?, ?, ?)", rows
+        )
+        return len(payload) + 32 * len(rows)
+
+    def _write_settings(self, guild_id: int, settings: dict):
+        self.conn.execute("DELETE FROM permissions WHERE guild_id = ?", (guild_id,))
+        rows = [(guild_id, user_id, "admin", i) for i, user_id in enumerate(settings["admins"])]
+        rows += [(guild_id, user_id, "moderator", i) for i, user_id in enumerate(settings["moderators"])]
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO permissions (guild_id, user_id, role, position) VALUES (?, ?, ?, ?)", rows
+        )
+        self.conn.execute("DELETE FROM settings WHERE guild_id = ?", (guild_id,))
+        settings_rows = [
+            (guild_id, key, json.dumps(value)) for key, value in settings.items()
+            if key not in ("admins", "moderators")
+        ]
+        self.conn.executemany("INSERT INTO settings (guild_id, key, value) VALUES (?, ?, ?)", settings_rows)
+        return 16 * len(rows) + sum(len(key) + len(value) for _, key, value in settings_rows)
+
+    def event_ids_for_user(self, user_id: int, guild_id: str) -> list:
+        rows = self.conn.execute(
+            "SELECT p.event_id FROM participations p JOIN events e ON e.event_id = p.event_id "
+            "WHERE p.user_id = ? AND e.guild_id = ?",
+            (user_id, int(guild_id))
+        )
+        return [event_id for event_id, in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def import_json(json_path: str, backend: SqliteBackend, legacy_guild_id: int | None = None):
+    """Einmaliger Import einer bestehenden event_data.json in die Datenbank."""
+    data = JsonBackend(json_path, legacy_guild_id).load()
+    changes = {"events": {}, "settings": {}, "archive": [], "stats": {}}
+    for guild_id, guild in data["guilds"].items():
+        for event_id, event in guild["events"].items():
+            changes["events"][(guild_id, event_id)] = event
+        changes["settings"][guild_id] = _plain_settings(guild)
+        for scope, entries in guild.get("stats", {}).items():
+            for key, counters in entries.items():
+                changes["stats"][(guild_id, scope, key)] = counters
+    if os.path.exists(_archive_path(json_path)):
+        with open(_archive_path(json_path), "r") as f:
+            for line in f:
+                record = json.loads(line)
+                changes["archive"].append((record.pop("guild_id"), record.pop("event_id"), record))
+    backend.write(changes)
+    log.info(f"{len(changes['events'])} Events aus {json_path} importiert.")
+
+
+def open_backend(kind: str, json_path: str, db_path: str, legacy_guild_id: int | None = None):
+    if kind == "sqlite":
+        backend = SqliteBackend(db_path, legacy_guild_id)
+        if backend.is_empty() and os.path.exists(json_path):
+            import_json(json_path, backend, legacy_guild_id)
+        return backend
+    return JsonBackend(json_path, legacy_guild_id)
+
+
+# --- In-Memory-Store ---
+
+class EventStore:
+    """Hält die Eventdaten im Speicher und schreibt Änderungen gebündelt zurück (Write-Behind).
+
+    Die Daten sind nach Guild partitioniert; ``guild(guild_id)`` liefert die Partition einer Guild.
+    Sämtliche Datei- und Datenbankzugriffe inklusive Serialisierung laufen in einem eigenen
+    Storage-Thread; im Event-Loop werden nur Kopien der geänderten Einträge angelegt.
+    """
+
+    def __init__(self, backend_factory, flush_delay: float = FLUSH_DELAY_SECONDS, timezone_name: str = DEFAULT_TIMEZONE):
+        self._backend_factory = backend_factory
+        self.timezone_name = timezone_name
+        self.backend = None
+        self.flush_delay = flush_delay
+        self.data = _default_data()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-store")
+        self._dirty_events: set[tuple] = set()
+        self._dirty_settings: set[str] = set()
+        self._dirty_stats: set[tuple] = set()
+        self._archive: list[tuple] = []
+        self._flush_handle = None
+        self._flush_task = None
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def load(self):
+        # Zeitzone vorab prüfen, damit ein Tippfehler nicht erst beim ersten Embed auffällt
+        ZoneInfo(self.timezone_name)
+
+        def _open():
+            backend = self._backend_factory()
+            data = backend.load()
+            migrated = []
+            for guild_id, guild in data["guilds"].items():
+                for event_id, event in guild["events"].items():
+                    event["participants"] = Participants.from_dict(event["participants"])
+                    if _migrate_event_times(event, self.timezone_name):
+                        migrated.append((guild_id, event_id))
+            return backend, data, migrated
+
+        with metrics.timer("pepega_store_load_seconds"):
+            self.backend, self.data, migrated = await self._run(_open)
+        if migrated:
+            log.info(f"{len(migrated)} Events auf Zeitstempel umgestellt.")
+            self._dirty_events.update(migrated)
+            self._schedule_flush()
+
+    def guild(self, guild_id) -> dict:
+        return self.data["guilds"].setdefault(str(guild_id), _default_guild())
+
+    def guild_ids(self) -> list:
+        return [int(guild_id) for guild_id in self.data["guilds"]]
+
+    def mark_event_dirty(self, guild_id, event_id: str):
+        self._dirty_events.add((str(guild_id), event_id))
+        self._schedule_flush()
+
+    def mark_settings_dirty(self, guild_id):
+        self._dirty_settings.add(str(guild_id))
+        self._schedule_flush()
+
+    def stats(self, guild_id) -> dict:
+        return self.guild(guild_id).setdefault("stats", {})
+
+    def archive_event(self, guild_id, event_id: str, event: dict, outcome: str):
+        """Übergibt ein beendetes Event ans Archiv und zählt es in die Statistik ein.
+
+        Das Event muss bereits aus der Partition entfernt sein; archiviert wird beim nächsten Flush.
+        """
+        guild_id = str(guild_id)
+        record = _plain_event(event)
+        record["outcome"] = outcome
+        record["archived_at"] = int(time.time())
+        self._archive.append((guild_id, event_id, record))
+        if outcome == "started":
+            self._count_event(guild_id, event)
+        self.mark_event_dirty(guild_id, event_id)
+
+    def _bump(self, guild_id: str, scope: str, key: str, **deltas):
+        counters = self.stats(guild_id).setdefault(scope, {}).setdefault(key, {})
+        for name, value in deltas.items():
+            counters[name] = counters.get(name, 0) + value
+        self._dirty_stats.add((guild_id, scope, key))
+
+    def _count_event(self, guild_id: str, event: dict):
+        # Nur die Teilnehmer dieses Events werden angefasst, nie die Historie
+        participants = event["participants"]
+        attended = list(participants["yes"])
+        waitlisted = list(participants["waiting"])
+        no_shows = [user_id for user_id in event.get("late_cancellations", []) if user_id not in participants["yes"]]
+        for user_id in attended:
+            self._bump(guild_id, "users", str(user_id), attended=1)
+        for user_id in waitlisted:
+            self._bump(guild_id, "users", str(user_id), waitlisted=1)
+        for user_id in no_shows:
+            self._bump(guild_id, "users", str(user_id), no_shows=1)
+        totals = {"events": 1, "attendees": len(attended), "waitlisted": len(waitlisted), "no_shows": len(no_shows)}
+        self._bump(guild_id, "games", event["game"].strip().lower(), **totals)
+        self._bump(guild_id, "totals", "guild", **totals)
+
+    def _schedule_flush(self):
+        # Mehrere Änderungen innerhalb des Intervalls landen in einem einzigen Schreibvorgang
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Ohne laufenden Event-Loop bleibt die Änderung vorgemerkt bis zum nächsten flush()
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.backend is None or not (self._dirty_events or self._dirty_settings or self._dirty_stats or self._archive):
+            return
+
+        events = {}
+        for guild_id, event_id in self._dirty_events:
+            event = self.guild(guild_id)["events"].get(event_id)
+            events[(guild_id, event_id)] = _plain_event(event) if event is not None else None
+        settings = {guild_id: _plain_settings(self.guild(guild_id)) for guild_id in self._dirty_settings}
+        stats = {
+            (guild_id, scope, key): dict(self.stats(guild_id)[scope][key])
+            for guild_id, scope, key in self._dirty_stats
+        }
+        changes = {"events": events, "settings": settings, "archive": self._archive, "stats": stats}
+        self._dirty_events = set()
+        self._dirty_settings = set()
+        self._dirty_stats = set()
+        self._archive = []
+        try:
+            with metrics.timer("pepega_store_flush_seconds"):
+                written = await self._run(self.backend.write, changes)
+            metrics.inc("pepega_store_bytes_written_total", written)
+            metrics.inc("pepega_store_flushed_events_total", len(changes["events"]))
+        except (OSError, sqlite3.Error) as e:
+            metrics.inc("pepega_store_flush_errors_total")
+            log.error(f"Fehler beim Speichern der Eventdaten: {e}")
+            # Beim nächsten Durchlauf erneut versuchen
+            self._dirty_events.update(changes["events"])
+            self._dirty_settings.update(changes["settings"])
+            self._dirty_stats.update(changes["stats"])
+            self._archive[:0] = changes["archive"]
+            self._schedule_flush()
+
+    async def event_ids_for_user(self, user_id: int, guild_id) -> list:
+        # Indexabfragen sehen nur geschriebene Daten – ausstehende Änderungen vorher sichern
+        await self.flush()
+        return await self._run(self.backend.event_ids_for_user, user_id, str(guild_id))
+
+    async def close(self):
+        await self.flush()
+        if self.backend is not None:
+            await self._run(self.backend.close)
+        self._executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Importiert eine event_data.json in eine SQLite-Datenbank.")
+    parser.add_argument("json_path", nargs="?", default="event_data.json")
+    parser.add_argument("db_path", nargs="?", default="event_data.db")
+    parser.add_argument("--guild-id", type=int, help="Guild für Daten aus dem alten Ein-Server-Format")
+    args = parser.parse_args()
+    import_json(args.json_path, SqliteBackend(args.db_path, args.guild_id), args.guild_id)